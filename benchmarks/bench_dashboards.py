@@ -0,0 +1,201 @@
+"""Benchmark headless des trois dashboards sur des ventes synthétiques.
+
+Usage : python -m benchmarks.bench_dashboards [--sizes N ...] [--variants main test versionpays]
+                                              [--uri URI] [--no-memory]
+                                              [--save FICHIER] [--baseline FICHIER] [--threshold 0.2]
+
+Sans --uri, les données sont dans un mongomock en mémoire (tailles par défaut
+10 k et 1 M ; mongomock est dans requirements-dev.txt) ; avec --uri, dans la
+base appleSales_bench d'un mongod local (10 k, 1 M et 10 M). Le client est
+passé aux dashboards par dashboard.CLIENT. Chaque variante tourne sous streamlit.testing.AppTest :
+un rerun à froid (caches vides) puis un rerun avec une sélection de pays. Les
+temps et pics mémoire par étape (load_*, draw_*) viennent de profiling.py ;
+« rerun » est le main() complet. Avec --baseline, le script échoue si une
+étape dépasse la référence de plus de --threshold.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pymongo
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import dashboard
+from generator import sales_documents
+from geometry import GEOJSON_PATH
+from incremental import SAFETY_LAG
+from indexes import ensure_indexes
+from summary import rebuild
+
+ROOT            = Path(__file__).resolve().parent.parent
+DB_NAME         = "appleSales"
+BENCH_DB        = "appleSales_bench"
+COLLECTION_NAME = "sales"
+VARIANTS        = ["main", "test", "versionpays"]
+SELECTION       = ["France", "Allemagne", "Italie", "Espagne", "Pologne"]
+CHUNK           = 50_000
+# En dessous, les écarts relèvent du bruit de mesure
+MIN_SECONDS     = 0.005
+
+
+# ─── BASE DE DONNÉES ────────────────────────────────────────────────────────────
+class _BenchClient:
+    # Client passé aux dashboards (dashboard.CLIENT) : appleSales -> appleSales_bench
+    def __init__(self, client):
+        self._client = client
+
+    def __getitem__(self, name):
+        return self._client[BENCH_DB if name == DB_NAME else name]
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def connect(uri=None):
+    if uri is None:
+        import mongomock
+        return mongomock.MongoClient()
+    return pymongo.MongoClient(uri)
+
+
+def load_dataset(collection, rows: int, seed: int = 0):
+    collection.drop()
+    for i, offset in enumerate(range(0, rows, CHUNK)):
+        collection.insert_many(sales_documents(min(CHUNK, rows - offset), (seed, i)), ordered=False)
+    ensure_indexes(collection)
+    # Résumé (pays, jour) lu par les dashboards hors mode incrémental
+    rebuild(collection)
+    # Le cache incrémental ignore les documents de moins de SAFETY_LAG
+    time.sleep(SAFETY_LAG.total_seconds() + 0.5)
+
+
+def workdir() -> str:
+    # Répertoire de travail où le chemin de géométrie des dashboards existe
+    path = Path(tempfile.mkdtemp(prefix="bench_dashboards_"))
+    sys.path.insert(0, str(ROOT))
+    link = path / GEOJSON_PATH
+    link.parent.mkdir(parents=True, exist_ok=True)
+    link.symlink_to(ROOT / "countriesgeo.json")
+    return str(path)
+
+
+# ─── EXÉCUTION ──────────────────────────────────────────────────────────────────
+def _stages(profile: dict) -> dict:
+    # Cumul par nom d'étape : une fonction peut être appelée plusieurs fois par rerun
+    out = {}
+    for s in profile["stages"]:
+        entry = out.setdefault(s["stage"], {"seconds": 0.0, "peak_mb": None})
+        entry["seconds"] += s["seconds"]
+        if s["peak_bytes"] is not None:
+            entry["peak_mb"] = max(entry["peak_mb"] or 0.0, s["peak_bytes"] / 2**20)
+    return out
+
+
+def run_variant(variant: str, memory: bool, timeout: float) -> dict:
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(str(ROOT / f"{variant}.py"), default_timeout=timeout)
+    results = {}
+    for run in ("froid", "sélection"):
+        if memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        if run == "froid":
+            at.run()
+        else:
+            at.sidebar.multiselect[0].set_value([c for c in SELECTION if c in at.sidebar.multiselect[0].options]).run()
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] / 2**20 if memory else None
+        if memory:
+            tracemalloc.stop()
+        if at.exception:
+            raise RuntimeError(f"{variant} ({run}) : {at.exception[0].value}")
+        stages = _stages(at.session_state["_profile_history"][-1])
+        stages["rerun"] = {"seconds": elapsed, "peak_mb": peak}
+        results[run] = stages
+    return results
+
+
+# ─── RAPPORT ET RÉGRESSIONS ─────────────────────────────────────────────────────
+def report(rows: int, by_variant: dict):
+    for run in ("froid", "sélection"):
+        names = sorted({n for r in by_variant.values() for n in r[run]}, key=lambda n: (n == "rerun", n))
+        print(f"\n{rows:,} lignes — rerun {run}")
+        print(f"{'étape':<30}" + "".join(f"{v:>24}" for v in by_variant))
+        for name in names:
+            cells = []
+            for results in by_variant.values():
+                entry = results[run].get(name)
+                if entry is None:
+                    cells.append(f"{'-':>24}")
+                    continue
+                mem = f"{entry['peak_mb']:7.1f} Mo" if entry["peak_mb"] is not None else ""
+                cells.append(f"{entry['seconds'] * 1000:>11.1f} ms{mem:>11}")
+            print(f"{name:<30}" + "".join(cells))
+
+
+def regressions(current: dict, baseline: dict, threshold: float) -> list:
+    out = []
+    for key, runs in current.items():
+        for run, stages in runs.items():
+            for name, entry in stages.items():
+                ref = baseline.get(key, {}).get(run, {}).get(name)
+                if ref is None or ref["seconds"] < MIN_SECONDS:
+                    continue
+                ratio = entry["seconds"] / ref["seconds"]
+                if ratio > 1 + threshold:
+                    out.append(f"{key} {run} {name} : {ref['seconds'] * 1000:.1f} -> "
+                               f"{entry['seconds'] * 1000:.1f} ms (x{ratio:.2f})")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=VARIANTS)
+    parser.add_argument("--uri", help="mongod local (défaut : mongomock en mémoire)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="sans tracemalloc : temps plus fidèles")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--save", help="écrit les résultats en JSON (future référence)")
+    parser.add_argument("--baseline", help="résultats JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2, help="hausse relative tolérée (0.2 = +20 %%)")
+    args = parser.parse_args()
+    sizes = args.sizes or ([10_000, 1_000_000] if args.uri is None else [10_000, 1_000_000, 10_000_000])
+
+    client = connect(args.uri)
+    dashboard.CLIENT = _BenchClient(client)
+    os.environ["SALES_PROFILE"] = "1"
+    os.chdir(workdir())
+
+    current = {}
+    try:
+        for rows in sizes:
+            load_dataset(client[BENCH_DB][COLLECTION_NAME], rows, args.seed)
+            by_variant = {v: run_variant(v, not args.no_memory, args.timeout) for v in args.variants}
+            report(rows, by_variant)
+            current.update({f"{v}/{rows}": r for v, r in by_variant.items()})
+    finally:
+        if args.uri is not None:
+            client.drop_database(BENCH_DB)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failed = regressions(current, baseline, args.threshold)
+        for line in failed:
+            print(f"❌ {line}")
+        if failed:
+            sys.exit(1)
+        print(f"✅ aucune régression au-delà de {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Mesure la taille de la géométrie envoyée au navigateur et le temps de rendu de la carte.
+
+Usage : python -m benchmarks.bench_geometry [--repeat N]
+
+« avant » : countriesgeo.json complet, intégré deux fois (Choropleth + GeoJson) ;
+« zoom N » : géométrie découpée aux pays d'ISO_MAP et simplifiée pour ce zoom.
+"""
+import argparse
+import gzip
+import json
+import time
+
+import folium
+import numpy as np
+import pandas as pd
+
+from countries import ISO_MAP
+from geometry import GEOJSON_PATH, ZOOM_TOLERANCES, prepared_geometry
+
+
+def fake_stats() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    iso = sorted(set(ISO_MAP.values()))
+    return pd.DataFrame({"ISO_A3": iso, "total": rng.integers(100, 10_000, len(iso))})
+
+
+def render_map(geojson: dict, stats: pd.DataFrame) -> str:
+    m = folium.Map(location=(54, 15), zoom_start=4)
+    folium.Choropleth(geo_data=geojson, data=stats, columns=["ISO_A3", "total"],
+                      key_on="feature.id", fill_color="YlOrRd").add_to(m)
+    folium.GeoJson(geojson, tooltip=folium.GeoJsonTooltip(fields=["name"])).add_to(m)
+    return m.get_root().render()
+
+
+def measure(label: str, text: str, stats: pd.DataFrame, repeat: int):
+    geojson = json.loads(text)
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        html = render_map(geojson, stats)
+        timings.append(time.perf_counter() - t0)
+    print(f"{label:<8} géométrie {len(text):>9,} o (gzip {len(gzip.compress(text.encode())):>8,} o)  "
+          f"page {len(html):>9,} o  rendu {np.median(timings) * 1000:>7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    stats = fake_stats()
+    with open(GEOJSON_PATH, encoding="utf-8") as f:
+        measure("avant", f.read(), stats, args.repeat)
+    for zoom in sorted(ZOOM_TOLERANCES):
+        measure(f"zoom {zoom}", prepared_geometry(ISO_MAP.values(), zoom), stats, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
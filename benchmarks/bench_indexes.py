@@ -0,0 +1,82 @@
+"""Latence par forme de filtre, sans puis avec les index de indexes.py.
+
+Usage : python -m benchmarks.bench_indexes [--uri URI] [--db NOM] [--rows N] [--repeat N]
+
+Mesure par défaut la base appleSales_bench, remplie de --rows ventes
+synthétiques si elle est vide ; --db appleSales vise la base des dashboards.
+Les index gérés sont supprimés pour la première mesure puis recréés ; à la
+fin, la collection retrouve exactement les index qu'elle avait au départ.
+"""
+import argparse
+import time
+
+import numpy as np
+from pymongo import IndexModel, MongoClient
+
+from generator import sales_documents
+from indexes import (COLLECTION_NAME, MONGO_URI, dashboard_queries, drop_indexes, ensure_indexes, run_query,
+                     sample_filters)
+
+BENCH_DB     = "appleSales_bench"
+CHUNK        = 50_000
+# Champs de index_information() qui ne sont pas des options de création
+INDEX_FIELDS = {"key", "v", "ns"}
+
+
+def restore_indexes(collection, initial: dict):
+    # Supprime les index apparus pendant la mesure, recrée ceux qui ont disparu (mêmes clés et options)
+    current = collection.index_information()
+    for name in set(current) - set(initial):
+        collection.drop_index(name)
+    missing = [IndexModel(info["key"], name=name, **{k: v for k, v in info.items() if k not in INDEX_FIELDS})
+               for name, info in initial.items() if name not in current]
+    if missing:
+        collection.create_indexes(missing)
+
+
+def time_queries(collection, filters: dict, repeat: int) -> dict:
+    # {(filtre, requête): latence médiane en ms}
+    out = {}
+    for label, args in filters.items():
+        for name, (kind, spec) in dashboard_queries(*args).items():
+            run_query(collection, kind, spec)  # échauffement du cache WiredTiger
+            timings = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                run_query(collection, kind, spec)
+                timings.append(time.perf_counter() - t0)
+            out[label, name] = np.median(timings) * 1000
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--db", default=BENCH_DB)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="ventes insérées si la collection est vide")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    collection = MongoClient(args.uri)[args.db][COLLECTION_NAME]
+    if collection.estimated_document_count() == 0:
+        for i, offset in enumerate(range(0, args.rows, CHUNK)):
+            collection.insert_many(sales_documents(min(CHUNK, args.rows - offset), (0, i)), ordered=False)
+    initial = collection.index_information()
+    filters = sample_filters(collection)
+    print(f"{collection.estimated_document_count():,} documents, médiane sur {args.repeat} exécutions")
+    try:
+        drop_indexes(collection)
+        without = time_queries(collection, filters, args.repeat)
+        ensure_indexes(collection)
+        with_idx = time_queries(collection, filters, args.repeat)
+    finally:
+        restore_indexes(collection, initial)
+
+    print(f"{'filtre':<14} {'requête':<15} {'sans index':>11} {'avec index':>11} {'gain':>7}")
+    for key, before in without.items():
+        after = with_idx[key]
+        print(f"{key[0]:<14} {key[1]:<15} {before:>8.1f} ms {after:>8.1f} ms {before / after:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
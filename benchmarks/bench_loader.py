@@ -0,0 +1,67 @@
+"""Compare le chargeur colonnaire à l'ancien chemin liste de dicts.
+
+Usage : python -m benchmarks.bench_loader [--uri URI] [--repeat N]
+Chaque méthode tourne dans un processus séparé pour mesurer un pic RSS propre.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from pymongo import MongoClient
+
+from loader import load_sales
+
+MONGO_URI       = "mongodb://127.0.0.1:27017/"
+DB_NAME         = "appleSales"
+COLLECTION_NAME = "sales"
+METHODS         = ["records", "columnar"]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss est en Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_one(uri: str, method: str) -> dict:
+    collection = MongoClient(uri)[DB_NAME][COLLECTION_NAME]
+    rss_before = peak_rss_mb()
+    t0 = time.perf_counter()
+    df = load_sales(collection, method=method)
+    elapsed = time.perf_counter() - t0
+    return {
+        "method":     method,
+        "rows":       len(df),
+        "seconds":    round(elapsed, 3),
+        "peak_rss":   round(peak_rss_mb(), 1),
+        "delta_rss":  round(peak_rss_mb() - rss_before, 1),
+        "frame_mb":   round(df.memory_usage(deep=True).sum() / 2**20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--method", choices=METHODS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.method:
+        print(json.dumps(run_one(args.uri, args.method)))
+        return
+
+    for _ in range(args.repeat):
+        for method in METHODS:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_loader", "--uri", args.uri, "--method", method],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{r['method']:<9} {r['rows']:>11,} lignes  {r['seconds']:>8.2f} s  "
+                  f"pic RSS {r['peak_rss']:>8.1f} Mo (+{r['delta_rss']:.1f})  DataFrame {r['frame_mb']:.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
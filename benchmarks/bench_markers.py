@@ -0,0 +1,86 @@
+"""Compare la couche de marqueurs vectorisée aux CircleMarker folium ligne par ligne.
+
+Usage : python -m benchmarks.bench_markers [--sizes N ...] [--legacy-max N] [--repeat N]
+
+« par ligne » : un folium.CircleMarker et un folium.Popup par point (ancien
+draw_interactive_country_map) ; « vectorisé » : maplayers.StatsMarkers, une
+passe sur les colonnes. Temps de construction + rendu HTML et taille de page.
+"""
+import argparse
+import math
+import time
+
+import folium
+import numpy as np
+import pandas as pd
+
+from maplayers import StatsMarkers, points_payload
+
+FIELDS  = ["name", "total", "transactions", "average", "maximum"]
+ALIASES = ["", "Total vendu :", "Transactions :", "Moyenne :", "Maximum :"]
+
+
+def fake_points(n: int, seed: int = 0) -> pd.DataFrame:
+    # Points de vente répartis sur l'Europe
+    rng = np.random.default_rng(seed)
+    transactions = rng.integers(1, 500, n)
+    return pd.DataFrame({
+        "name":         [f"Magasin {i}" for i in range(n)],
+        "total":        transactions * rng.integers(1, 20, n),
+        "transactions": transactions,
+        "average":      rng.uniform(1, 20, n).round(1),
+        "maximum":      rng.integers(20, 50, n),
+        "lat":          rng.uniform(36, 70, n),
+        "lon":          rng.uniform(-10, 40, n),
+    })
+
+
+def legacy_map(points: pd.DataFrame) -> str:
+    m = folium.Map(location=(54, 15), zoom_start=4)
+    for _, row in points.iterrows():
+        popup_html = (f"<b>{row['name']}</b><br>Total vendu : {row['total']}<br>"
+                      f"Transactions : {row['transactions']}<br>Moyenne : {row['average']:.1f}<br>"
+                      f"Maximum : {row['maximum']}")
+        folium.CircleMarker(location=(row["lat"], row["lon"]), radius=math.sqrt(row["total"]) * 0.2,
+                            color="crimson", fill=True, fill_opacity=0.6,
+                            popup=folium.Popup(popup_html, max_width=250),
+                            tooltip=f"{row['name']} – {row['total']} pommes").add_to(m)
+    folium.LayerControl().add_to(m)
+    return m.get_root().render()
+
+
+def vector_map(points: pd.DataFrame) -> str:
+    m = folium.Map(location=(54, 15), zoom_start=4)
+    StatsMarkers(points_payload(points, FIELDS), fields=FIELDS, aliases=ALIASES, radius_field="total",
+                 radius_scale=0.2, unit="pommes", name="Ventes").add_to(m)
+    folium.LayerControl().add_to(m)
+    return m.get_root().render()
+
+
+def measure(label: str, build, points: pd.DataFrame, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        html = build(points)
+        timings.append(time.perf_counter() - t0)
+    print(f"{len(points):>9,} points  {label:<10} rendu {np.median(timings) * 1000:>9.1f} ms  "
+          f"page {len(html) / 2**20:>8.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000,
+                        help="au-delà, la version par ligne n'est pas mesurée (trop lente)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        points = fake_points(n)
+        if n <= args.legacy_max:
+            measure("par ligne", legacy_map, points, args.repeat)
+        measure("vectorisé", vector_map, points, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
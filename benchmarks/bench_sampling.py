@@ -0,0 +1,73 @@
+"""Mesure le gain de temps des statistiques approchées sur le groupby des lignes brutes.
+
+Usage : python -m benchmarks.bench_sampling [--rows N] [--sizes N ...]
+
+Sur des ventes synthétiques, l'estimation sur un tirage uniforme (le `$sample`
+du repli MongoDB, simulé en mémoire) est chronométrée pour plusieurs
+sélections et comparée au groupby des lignes brutes, que le repli remplace ;
+le cube, plus rapide que les deux, est donné pour référence. La couverture
+des intervalles est vérifiée par tests/test_sampling.py.
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from generator import sales_frame
+from rollup import RollupCube
+from sampling import MONGO_SAMPLE_SIZE, SalesSample
+from store import SalesStore
+
+SELECTIONS = {
+    "tous les pays, toute la période": (None, None, None),
+    "tous les pays, un trimestre":     (None, datetime(2025, 4, 1), datetime(2025, 7, 1)),
+    "cinq pays, un mois":              (("France", "Allemagne", "Italie", "Espagne", "Pologne"),
+                                        datetime(2025, 10, 1), datetime(2025, 11, 1)),
+}
+
+
+# ─── ÉCHANTILLONS ───────────────────────────────────────────────────────────────
+def uniform(frame, size: int, seed) -> SalesSample:
+    rows = frame.iloc[np.random.default_rng(seed).choice(len(frame), size, replace=False)]
+    return SalesSample.from_documents(rows.astype({"country": str}).to_dict("records"), len(frame))
+
+
+def _mask(frame, countries, start, end):
+    mask = np.ones(len(frame), dtype=bool)
+    if countries is not None:
+        mask &= frame["country"].isin(countries).to_numpy()
+    if start is not None:
+        mask &= (frame["purchaseDate"] >= start).to_numpy()
+    if end is not None:
+        mask &= (frame["purchaseDate"] < end).to_numpy()
+    return mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[MONGO_SAMPLE_SIZE])
+    args = parser.parse_args()
+
+    frame = sales_frame(args.rows, seed=0)
+    store = SalesStore(frame)
+    cube = RollupCube.from_store(store)
+
+    print(f"{args.rows:,} lignes, temps moyen de 5 requêtes ; colonnes : {' | '.join(SELECTIONS)}")
+    for label, run in [
+        ("lignes brutes (groupby)", lambda countries, start, end: frame[_mask(frame, countries, start, end)]
+            .groupby("country", observed=True)["quantity"].agg(["sum", "count", "mean", "max"])),
+        ("cube pays × jour",        cube.query),
+    ] + [(f"échantillon {size:,}", uniform(frame, size, 0).stats) for size in args.sizes]:
+        cells = []
+        for selection in SELECTIONS.values():
+            t0 = time.perf_counter()
+            for _ in range(5):
+                run(*selection)
+            cells.append(f"{(time.perf_counter() - t0) / 5 * 1000:8.2f} ms")
+        print(f"  {label:<24} {'  '.join(cells)}")
+
+
+if __name__ == "__main__":
+    main()
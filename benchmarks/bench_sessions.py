@@ -0,0 +1,104 @@
+"""Simule N sessions Streamlit concurrentes sur un même processus.
+
+Usage : python -m benchmarks.bench_sessions [--rows N] [--sessions N] [--reruns N]
+
+Mode « copy » : chaque rerun reçoit sa propre copie du DataFrame (comportement de
+st.cache_data) puis filtre avec isin + sort_values, comme main() auparavant.
+Mode « store » : toutes les sessions lisent le même SalesStore et ne
+matérialisent que les lignes sélectionnées.
+"""
+import argparse
+import pickle
+import random
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from generator import COUNTRY_WEIGHTS, sales_frame
+from store import SalesStore
+
+# Sous-ensemble de pays, à volumes pondérés comme dans generator.COUNTRY_WEIGHTS
+COUNTRIES = [
+    "Allemagne", "Autriche", "Belgique", "Danemark", "Espagne", "Finlande", "France",
+    "Irlande", "Islande", "Italie", "Norvège", "Pays-Bas", "Pologne", "Suède", "Suisse",
+]
+
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    weights = {c: COUNTRY_WEIGHTS[c] for c in COUNTRIES}
+    return sales_frame(rows, seed, start="2023-01-01", end="2026-01-01", weights=weights)
+
+
+def rerun_copy(cached: bytes, sel: list):
+    df = pickle.loads(cached)
+    df_filt = df[df["country"].isin(sel)]
+    table = df_filt[["purchaseDate", "quantity", "country"]].sort_values("purchaseDate").reset_index(drop=True)
+    stats = df_filt.groupby("country", observed=True).quantity.agg(["sum", "count", "mean", "max"])
+    return len(table), len(stats)
+
+
+def rerun_store(store: SalesStore, sel: list):
+    idx = store.select(sel)
+    table = store.take(idx)
+    totals = [int(store.quantity[store.country_slice(c)].sum()) for c in sel]
+    return len(table), len(totals)
+
+
+def run(mode: str, frame: pd.DataFrame, sessions: int, reruns: int) -> dict:
+    if mode == "copy":
+        shared = pickle.dumps(frame)
+        rerun = rerun_copy
+    else:
+        shared = SalesStore(frame)
+        rerun = rerun_store
+
+    latencies = []
+    lock = threading.Lock()
+
+    def session(seed: int):
+        rnd = random.Random(seed)
+        for _ in range(reruns):
+            sel = rnd.sample(COUNTRIES, rnd.randint(1, 6))
+            t0 = time.perf_counter()
+            rerun(shared, sel)
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "mode": mode, "wall": wall, "peak_mb": peak / 2**20,
+        "p50": np.percentile(ms, 50), "p95": np.percentile(ms, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    frame = synthetic_frame(args.rows)
+    print(f"{args.rows:,} lignes, {args.sessions} sessions × {args.reruns} reruns")
+    for mode in ("copy", "store"):
+        r = run(mode, frame, args.sessions, args.reruns)
+        print(f"{r['mode']:<6} pic mémoire {r['peak_mb']:>8.1f} Mo  "
+              f"rerun p50 {r['p50']:>8.1f} ms  p95 {r['p95']:>8.1f} ms  total {r['wall']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Compare l'ouverture d'un instantané mappé à la reconstruction du store dans chaque processus.
+
+Usage : python -m benchmarks.bench_snapshot [--sizes N ...] [--processes N]
+
+« reconstruit » : ce que fait chaque processus après un chargement MongoDB
+(tri du SalesStore, ordre chronologique, cube) ; « instantané » : snapshot.
+read_snapshot puis le même cube. Chaque méthode tourne dans --processes
+processus simultanés ; mémoire anonyme = mémoire privée gardée par le
+store de chaque processus, non partagée (Linux, /proc/self/smaps_rollup). Le
+chargement MongoDB lui-même n'est pas compté (voir bench_loader).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from generator import sales_frame
+from rollup import RollupCube
+from snapshot import read_snapshot, write_snapshot
+from store import SalesStore
+
+METHODS = ["reconstruit", "instantané"]
+
+
+def anonymous_mb():
+    # Pages privées du processus ; None hors Linux
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Anonymous:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def run_one(method: str, rows: int, path: str) -> dict:
+    before = anonymous_mb()
+    # Lignes telles que reçues de MongoDB, libérées une fois le store construit comme dans IncrementalSales
+    frame = sales_frame(rows, seed=0) if method == "reconstruit" else None
+    t0 = time.perf_counter()
+    if method == "reconstruit":
+        store = SalesStore(frame)
+    else:
+        store, _ = read_snapshot(path)
+    store.date_order()
+    del frame
+    # Mémoire du store seul : le cube, identique pour les deux méthodes, laisse des temporaires dans le tas
+    after = anonymous_mb()
+    cube = RollupCube.from_store(store)
+    elapsed = time.perf_counter() - t0
+    return {
+        "method":  method,
+        "rows":    len(store),
+        "days":    cube.n_days,
+        "seconds": round(elapsed, 3),
+        "anon_mb": round(after - before, 1) if before is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--method", choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.method:
+        print(json.dumps(run_one(args.method, args.rows, args.path)))
+        return
+
+    for rows in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sales_snapshot.arrow")
+            store = SalesStore(sales_frame(rows, seed=0))
+            t0 = time.perf_counter()
+            write_snapshot(path, store, high_water="0" * 24)
+            print(f"{rows:>11,} lignes  écriture {time.perf_counter() - t0:6.2f} s  "
+                  f"fichier {os.path.getsize(path) / 2**20:7.1f} Mo")
+            del store
+            for method in METHODS:
+                procs = [subprocess.Popen([sys.executable, "-m", "benchmarks.bench_snapshot", "--method", method,
+                                           "--rows", str(rows), "--path", path],
+                                          stdout=subprocess.PIPE, text=True)
+                         for _ in range(args.processes)]
+                results = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+                seconds = max(r["seconds"] for r in results)
+                anon = [r["anon_mb"] for r in results if r["anon_mb"] is not None]
+                memory = f"  mémoire anonyme {sum(anon):8.1f} Mo au total" if anon else ""
+                print(f"  {method:<12} {args.processes} processus  {seconds:6.2f} s (le plus lent){memory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Mesure le démarrage à froid des dashboards avec python -X importtime.
+
+Usage : python -m benchmarks.bench_startup [--variants main test versionpays] [--repeat N] [--top N]
+                                           [--save FICHIER] [--baseline FICHIER] [--threshold 0.2]
+
+Chaque mesure est un processus neuf ; médiane sur --repeat. « script » : ce
+que l'import du dashboard ajoute une fois streamlit chargé par le serveur,
+c.-à-d. ce qui précède le premier affichage ; « processus » : import complet
+depuis un interpréteur vide ; « différé » : modules de rendu
+(warmup.RENDER_MODULES) importés ensuite en arrière-plan. Les --top imports
+directs les plus coûteux du script sont listés.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from warmup import RENDER_MODULES
+
+ROOT           = Path(__file__).resolve().parent.parent
+VARIANTS       = ["main", "test", "versionpays"]
+# Déjà importés par `streamlit run` avant l'exécution du script
+SERVER_MODULES = ["streamlit", "streamlit.web.bootstrap"]
+MARKER         = "--- bench_startup ---"
+# En dessous, les écarts relèvent du bruit de mesure
+MIN_MS         = 5.0
+
+
+# ─── MESURE ─────────────────────────────────────────────────────────────────────
+def import_times(preload: list, modules: list) -> list:
+    """[(module, propre µs, cumulé µs, profondeur)] des imports de `modules`, `preload` déjà chargés."""
+    code = "; ".join([*(f"import {m}" for m in preload),
+                      f"import sys; sys.stderr.write({MARKER!r} + '\\n')",
+                      *(f"import {m}" for m in modules)])
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    lines = proc.stderr.splitlines()
+    out = []
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        out.append((name.strip(), int(self_us), int(cumulative), (len(name) - len(name.lstrip()) - 1) // 2))
+    return out
+
+
+def total_ms(entries: list) -> float:
+    return sum(e[1] for e in entries) / 1000
+
+
+def measure(variant: str, repeat: int) -> dict:
+    script, process, deferred = [], [], []
+    for _ in range(repeat):
+        entries = import_times(SERVER_MODULES, [variant])
+        script.append(total_ms(entries))
+        process.append(total_ms(import_times([], [variant])))
+        deferred.append(total_ms(import_times([*SERVER_MODULES, variant], RENDER_MODULES)))
+    # Imports directs du script (profondeur 1), du dernier passage
+    direct = sorted(((name, cum / 1000) for name, _, cum, depth in entries if depth == 1),
+                    key=lambda item: -item[1])
+    return {
+        "script_ms":   statistics.median(script),
+        "process_ms":  statistics.median(process),
+        "deferred_ms": statistics.median(deferred),
+        "direct":      direct,
+    }
+
+
+# ─── RAPPORT ET RÉGRESSIONS ─────────────────────────────────────────────────────
+def report(results: dict, top: int):
+    print(f"{'variante':<14}{'script':>12}{'processus':>14}{'différé':>12}")
+    for variant, r in results.items():
+        print(f"{variant:<14}{r['script_ms']:>9.1f} ms{r['process_ms']:>11.1f} ms{r['deferred_ms']:>9.1f} ms")
+    for variant, r in results.items():
+        print(f"\n{variant} — imports directs les plus coûteux")
+        for name, ms in r["direct"][:top]:
+            print(f"  {name:<34}{ms:>9.1f} ms")
+
+
+def regressions(current: dict, baseline: dict, threshold: float) -> list:
+    out = []
+    for variant, r in current.items():
+        ref = baseline.get(variant)
+        if ref is None or ref["script_ms"] < MIN_MS:
+            continue
+        ratio = r["script_ms"] / ref["script_ms"]
+        if ratio > 1 + threshold:
+            out.append(f"{variant} script : {ref['script_ms']:.1f} -> {r['script_ms']:.1f} ms (x{ratio:.2f})")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=VARIANTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--save", help="écrit les résultats en JSON (future référence)")
+    parser.add_argument("--baseline", help="résultats JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2, help="hausse relative tolérée (0.2 = +20 %%)")
+    args = parser.parse_args()
+
+    current = {v: measure(v, args.repeat) for v in args.variants}
+    report(current, args.top)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failed = regressions(current, baseline, args.threshold)
+        for line in failed:
+            print(f"❌ {line}")
+        if failed:
+            sys.exit(1)
+        print(f"✅ aucune régression au-delà de {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
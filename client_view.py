@@ -0,0 +1,189 @@
+import json
+
+import numpy as np
+from branca.utilities import color_brewer
+from jinja2 import Template
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+PLOTLY_JS  = "https://cdn.plot.ly/plotly-2.35.2.min.js"
+LEAFLET_JS = "https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"
+LEAFLET_CSS = "https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"
+
+
+# ─── DONNÉES ENVOYÉES UNE FOIS AU NAVIGATEUR ────────────────────────────────────
+def cube_payload(cube, iso_map: dict) -> dict:
+    # Par pays : séries journalières (somme, nombre, max) restreintes à ses jours actifs
+    series = {}
+    for i, country in enumerate(cube.countries):
+        active = np.flatnonzero(cube.count[i])
+        if not len(active):
+            continue
+        lo, hi = int(active[0]), int(active[-1]) + 1
+        series[country] = {
+            "o":   lo,
+            "iso": iso_map.get(country),
+            "t":   cube.total[i, lo:hi].tolist(),
+            "c":   cube.count[i, lo:hi].tolist(),
+            "m":   np.maximum(cube.maximum[i, lo:hi], 0).tolist(),
+        }
+    return {"first_day": str(cube.first_day), "n_days": cube.n_days, "series": series}
+
+
+def _compact(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+# ─── PAGE AUTONOME ──────────────────────────────────────────────────────────────
+CLIENT_TEMPLATE = Template(
+    """
+<link rel="stylesheet" href="{{ leaflet_css }}"/>
+<script src="{{ plotly_js }}"></script>
+<script src="{{ leaflet_js }}"></script>
+<style>
+  body { font-family: "Source Sans Pro", sans-serif; margin: 0; }
+  #controls { display: flex; gap: 1rem; align-items: flex-start; flex-wrap: wrap; margin-bottom: .5rem; }
+  #controls label { display: block; font-size: .85rem; color: #555; }
+  #countries { min-width: 14rem; height: 8rem; }
+  #charts { display: flex; flex-wrap: wrap; }
+  #bar { flex: 3 1 30rem; height: 420px; } #radar { flex: 2 1 20rem; height: 420px; }
+  #map { height: {{ map_height }}px; }
+  .legend { background: white; padding: .3rem .5rem; line-height: 1.2rem; font-size: .8rem; }
+  .legend i { display: inline-block; width: 1rem; height: .8rem; margin-right: .3rem; }
+</style>
+<div id="controls">
+  <div><label for="preset">Preset de région</label><select id="preset"></select></div>
+  <div><label for="countries">Pays</label><select id="countries" multiple></select></div>
+  <div><label for="start">Du</label><input type="date" id="start"></div>
+  <div><label for="end">Au (inclus)</label><input type="date" id="end"></div>
+  <div id="summary"></div>
+</div>
+<div id="charts"><div id="bar"></div><div id="radar"></div></div>
+<div id="map"></div>
+<script>
+(function() {
+  var DATA = {{ payload }};
+  var PRESETS = {{ presets }};
+  var COLORS = {{ colors }};
+  var DAY = 86400000;
+  var firstDay = Date.parse(DATA.first_day);
+  var names = Object.keys(DATA.series).sort();
+
+  // Sommes cumulées : total et nombre sur une plage de jours en O(1)
+  names.forEach(function(n) {
+    var s = DATA.series[n], t = 0, c = 0;
+    s.pt = [0]; s.pc = [0];
+    for (var i = 0; i < s.t.length; i++) { t += s.t[i]; c += s.c[i]; s.pt.push(t); s.pc.push(c); }
+  });
+
+  function rangeStats(name, lo, hi) {
+    var s = DATA.series[name];
+    var a = Math.max(lo - s.o, 0), b = Math.min(hi - s.o, s.t.length);
+    if (b <= a) return null;
+    var count = s.pc[b] - s.pc[a];
+    if (!count) return null;
+    var max = 0;
+    for (var i = a; i < b; i++) if (s.m[i] > max) max = s.m[i];
+    var total = s.pt[b] - s.pt[a];
+    return {total: total, transactions: count, average: total / count, maximum: max};
+  }
+
+  var preset = document.getElementById("preset");
+  var select = document.getElementById("countries");
+  var start = document.getElementById("start");
+  var end = document.getElementById("end");
+  Object.keys(PRESETS).forEach(function(p) { preset.add(new Option(p, p)); });
+  names.forEach(function(n) { select.add(new Option(n, n)); });
+  var iso = function(ms) { return new Date(ms).toISOString().slice(0, 10); };
+  start.value = start.min = end.min = iso(firstDay);
+  end.value = start.max = end.max = iso(firstDay + (DATA.n_days - 1) * DAY);
+
+  var map = L.map("map").setView([54, 15], {{ zoom }});
+  L.tileLayer("https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png",
+              {attribution: "&copy; OpenStreetMap &copy; CARTO"}).addTo(map);
+  var byIso = {};
+  var edges = [];
+  function fill(total) {
+    for (var i = COLORS.length - 1; i > 0; i--) if (total >= edges[i]) return COLORS[i];
+    return COLORS[0];
+  }
+  var geo = L.geoJson({{ geometry }}, {
+    style: function(f) {
+      var s = byIso[f.id];
+      return {weight: 1, color: "black", opacity: .2, fillColor: s ? fill(s.total) : "black", fillOpacity: .7};
+    },
+    onEachFeature: function(f, layer) {
+      layer.bindTooltip(function() {
+        var s = byIso[f.id] || {name: f.id, total: 0, transactions: 0, average: 0, maximum: 0};
+        return "<b>" + s.name + "</b><br>Total : " + s.total.toLocaleString() +
+               "<br>Transactions : " + s.transactions.toLocaleString() +
+               "<br>Moyenne : " + s.average.toFixed(1) + "<br>Max : " + s.maximum;
+      }, {sticky: true});
+    }
+  }).addTo(map);
+  var legend = L.control({position: "topright"});
+  legend.onAdd = function() { this.div = L.DomUtil.create("div", "legend"); return this.div; };
+  legend.addTo(map);
+
+  function update() {
+    var sel = Array.from(select.selectedOptions).map(function(o) { return o.value; });
+    var lo = Math.round((Date.parse(start.value) - firstDay) / DAY);
+    var hi = Math.round((Date.parse(end.value) - firstDay) / DAY) + 1;
+    var rows = [];
+    sel.forEach(function(n) { var s = rangeStats(n, lo, hi); if (s) { s.name = n; rows.push(s); } });
+    rows.sort(function(a, b) { return a.name < b.name ? -1 : 1; });
+
+    Plotly.react("bar", [{type: "bar", x: rows.map(function(r) { return r.name; }),
+                          y: rows.map(function(r) { return r.total; })}],
+                 {title: "Ventes totales de pommes par pays", margin: {t: 40},
+                  xaxis: {title: "Pays"}, yaxis: {title: "Quantité vendue"}});
+    var theta = sel.concat(sel.slice(0, 1));
+    var r = theta.map(function(n) { var s = rangeStats(n, lo, hi); return s ? s.total : null; });
+    Plotly.react("radar", [{type: "scatterpolar", r: r, theta: theta, fill: "toself", marker: {color: "firebrick"}}],
+                 {title: "Radar chart des ventes (sélection)", polar: {radialaxis: {visible: true}}, margin: {t: 40}});
+
+    byIso = {};
+    rows.forEach(function(s) { var code = DATA.series[s.name].iso; if (code) byIso[code] = s; });
+    var totals = rows.map(function(s) { return s.total; });
+    var vmin = Math.min.apply(null, totals), vmax = Math.max.apply(null, totals);
+    if (vmax === vmin) vmax = vmin + 1;
+    edges = COLORS.map(function(_, i) { return vmin + (vmax - vmin) * i / COLORS.length; });
+    geo.setStyle(geo.options.style);
+    legend.div.innerHTML = rows.length ? COLORS.map(function(c, i) {
+      return "<i style='background:" + c + "'></i>" + Math.round(edges[i]).toLocaleString();
+    }).join("<br>") : "";
+
+    var total = totals.reduce(function(a, b) { return a + b; }, 0);
+    document.getElementById("summary").innerHTML = "<b>" + total.toLocaleString() + "</b> pommes vendues";
+  }
+
+  preset.onchange = function() {
+    var wanted = PRESETS[preset.value] || [];
+    Array.from(select.options).forEach(function(o) { o.selected = wanted.indexOf(o.value) >= 0; });
+    update();
+  };
+  select.onchange = start.onchange = end.onchange = update;
+  update();
+})();
+</script>
+"""
+)
+
+
+def render_client_dashboard(cube, geometry: str, presets: dict, iso_map: dict,
+                            zoom: int = 4, map_height: int = 600) -> str:
+    """Page HTML autonome : filtres, bar chart, radar et choroplèthe calculés dans le navigateur.
+
+    Le cube (pays × jour) et la géométrie sont envoyés une seule fois ; changer de
+    pays ou de dates ne provoque aucun rerun Streamlit.
+    """
+    return CLIENT_TEMPLATE.render(
+        payload=_compact(cube_payload(cube, iso_map)),
+        presets=_compact(presets),
+        colors=_compact(color_brewer("YlOrRd", n=6)),
+        geometry=geometry,
+        zoom=zoom,
+        map_height=map_height,
+        plotly_js=PLOTLY_JS,
+        leaflet_js=LEAFLET_JS,
+        leaflet_css=LEAFLET_CSS,
+    )
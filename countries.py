@@ -0,0 +1,104 @@
+"""Dimension pays : code ISO, coordonnées de la capitale et régions.
+
+Table unique partagée par les trois dashboards. Un pays peut appartenir à
+plusieurs régions : les agrégats régionaux le comptent dans chacune d'elles et
+les pays sans région sont regroupés dans « Autres ». Les totaux par région se
+calculent à partir des agrégats par pays, jamais des lignes brutes.
+"""
+import pandas as pd
+
+# ─── PAYS ───────────────────────────────────────────────────────────────────────
+# {pays: (ISO A3, latitude, longitude de la capitale)}
+_COUNTRIES = {
+    # Europe
+    "Albanie":               ("ALB",   41.3275,   19.8187),
+    "Allemagne":             ("DEU",   52.5200,   13.4050),
+    "Andorre":               ("AND",   42.5063,    1.5218),
+    "Arménie":               ("ARM",   40.1792,   44.4991),
+    "Autriche":              ("AUT",   48.2082,   16.3738),
+    "Azerbaïdjan":           ("AZE",   40.4093,   49.8671),
+    "Biélorussie":           ("BLR",   53.9045,   27.5615),
+    "Belgique":              ("BEL",   50.8503,    4.3517),
+    "Bosnie-Herzégovine":    ("BIH",   43.8563,   18.4131),
+    "Bulgarie":              ("BGR",   42.6977,   23.3219),
+    "Chypre":                ("CYP",   35.1856,   33.3823),
+    "Croatie":               ("HRV",   45.8144,   15.9780),
+    "Danemark":              ("DNK",   55.6761,   12.5683),
+    "Espagne":               ("ESP",   40.4168,   -3.7038),
+    "Estonie":               ("EST",   59.4370,   24.7536),
+    "Finlande":              ("FIN",   60.1699,   24.9384),
+    "France":                ("FRA",   48.8566,    2.3522),
+    "Géorgie":               ("GEO",   41.7151,   44.8271),
+    "Grèce":                 ("GRC",   37.9838,   23.7275),
+    "Hongrie":               ("HUN",   47.4979,   19.0402),
+    "Irlande":               ("IRL",   53.3498,   -6.2603),
+    "Islande":               ("ISL",   64.1265,  -21.8174),
+    "Italie":                ("ITA",   41.9028,   12.4964),
+    "Kazakhstan":            ("KAZ",   51.1605,   71.4704),
+    "Kosovo":                ("XKX",   42.6629,   21.1655),
+    "Lettonie":              ("LVA",   56.9496,   24.1052),
+    "Liechtenstein":         ("LIE",   47.1410,    9.5215),
+    "Lituanie":              ("LTU",   54.6872,   25.2797),
+    "Luxembourg":            ("LUX",   49.6116,    6.1319),
+    "Macédoine du Nord":     ("MKD",   41.9981,   21.4254),
+    "Malte":                 ("MLT",   35.9375,   14.3754),
+    "Moldavie":              ("MDA",   47.0105,   28.8638),
+    "Monaco":                ("MCO",   43.7384,    7.4246),
+    "Monténégro":            ("MNE",   42.4304,   19.2594),
+    "Norvège":               ("NOR",   59.9139,   10.7522),
+    "Pays-Bas":              ("NLD",   52.3676,    4.9041),
+    "Pologne":               ("POL",   52.2297,   21.0122),
+    "Portugal":              ("PRT",   38.7223,   -9.1393),
+    "République tchèque":    ("CZE",   50.0755,   14.4378),
+    "Roumanie":              ("ROU",   44.4268,   26.1025),
+    "Royaume-Uni":           ("GBR",   51.5074,   -0.1278),
+    "Russie":                ("RUS",   55.7558,   37.6176),
+    "Saint-Marin":           ("SMR",   43.9424,   12.4578),
+    "Serbie":                ("SRB",   44.7866,   20.4489),
+    "Slovaquie":             ("SVK",   48.1486,   17.1077),
+    "Slovénie":              ("SVN",   46.0569,   14.5058),
+    "Suède":                 ("SWE",   59.3293,   18.0686),
+    "Suisse":                ("CHE",   46.9480,    7.4474),
+    "Turquie":               ("TUR",   39.9334,   32.8597),
+    "Ukraine":               ("UKR",   50.4501,   30.5234),
+    "Vatican":               ("VAT",   41.9029,   12.4534),
+    # Autres
+    "Brésil":                ("BRA",  -15.7939,  -47.8828),
+    "États-Unis":            ("USA",   38.9072,  -77.0369),
+    "Japon":                 ("JPN",   35.6895,  139.6917),
+    "Afrique du Sud":        ("ZAF",  -25.7479,   28.2293),
+}
+
+COUNTRY_DIM    = pd.DataFrame.from_dict(_COUNTRIES, orient="index", columns=["iso_a3", "lat", "lon"]) \
+                   .rename_axis("country")
+ISO_MAP        = COUNTRY_DIM["iso_a3"].to_dict()
+
+# ─── RÉGIONS ────────────────────────────────────────────────────────────────────
+OTHER_REGION = "Autres"
+
+# Presets de régions (un pays peut figurer dans plusieurs)
+REGION_PRESETS = {
+    "Aucun": [],
+    "Nordiques": ["Danemark", "Finlande", "Islande", "Norvège", "Suède"],
+    "Europe de l'Ouest": ["France", "Allemagne", "Belgique", "Pays-Bas", "Luxembourg", "Irlande", "Suisse", "Autriche"],
+    "Europe de l'Est": ["Pologne", "République tchèque", "Slovaquie", "Hongrie", "Bulgarie", "Roumanie"],
+    "Asie": ["Japon", "Chypre", "Russie", "Kazakhstan", "Géorgie", "Arménie", "Azerbaïdjan"],
+    "Amériques": ["États-Unis", "Brésil"],
+}
+
+
+def region_members(regions: dict) -> pd.DataFrame:
+    # Table d'appartenance (region, country) : une ligne par couple, sans doublon
+    pairs = [(r, c) for r, members in regions.items() for c in dict.fromkeys(members)]
+    return pd.DataFrame(pairs, columns=["region", "country"])
+
+
+def by_region(frame: pd.DataFrame, regions: dict, keys=(), values=("total", "transactions")) -> pd.DataFrame:
+    """Somme `values` par région (et par `keys`) d'un tableau déjà agrégé par pays.
+
+    Jointure avec la table d'appartenance : le coût dépend du nombre de pays,
+    pas du nombre de ventes.
+    """
+    joined = frame.merge(region_members(regions), on="country", how="left")
+    joined["region"] = joined["region"].fillna(OTHER_REGION)
+    return joined.groupby([*keys, "region"], as_index=False, sort=True)[list(values)].sum()
@@ -0,0 +1,375 @@
+"""Données, filtres et vues communs aux trois dashboards Streamlit.
+
+main.py, test.py et versionpays.py n'en gardent que leur mise en page
+(main()) : chargeurs, caches, pagination du détail, export et draw_* sont
+définis une seule fois ici.
+"""
+import streamlit as st
+import pandas as pd
+from pymongo import MongoClient
+import math
+from datetime import datetime, time, timedelta
+
+from countries import COUNTRY_DIM, ISO_MAP, REGION_PRESETS
+from exports import EXPORT_FORMATS, export_file, mongo_batches
+from geometry import GEOJSON_PATH, prepared_geometry
+from incremental import IncrementalSales
+import profiling
+from queries import (PAGE_SIZE, fetch_countries, fetch_country_stats, fetch_detail_page, fetch_region_stats,
+                     fetch_summary_countries, fetch_summary_daily, fetch_summary_stats, region_totals)
+from rendercache import RenderCache, figure_bytes
+from rollup import RollupCube
+from sampling import CONFIDENCE_LABEL, fetch_sample, with_intervals
+from summary import summary_of
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MONGO_URI       = "mongodb://127.0.0.1:27017/"
+DB_NAME         = "appleSales"
+COLLECTION_NAME = "sales"
+REFRESH_SECONDS = 600
+# Connexions simultanées au plus (requêtes parallèles de toutes les sessions)
+POOL_SIZE       = 20
+# True : données en mémoire rafraîchies par deltas ; False : résumé MongoDB relu à chaque expiration
+INCREMENTAL     = True
+# Mode incrémental : instantané disque écrit par snapshot.py, partagé par les processus de l'hôte ;
+# None : chargement depuis MongoDB dans chaque processus
+SNAPSHOT_PATH   = None
+MAP_ZOOM        = 4
+# Client MongoDB fourni par l'appelant (benchmarks sur mongomock) ; None : MongoClient(MONGO_URI)
+CLIENT          = None
+
+
+# ─── CHARGEMENT DES DONNÉES ──────────────────────────────────────────────────────
+# Un seul client par processus : son pool de connexions sert toutes les sessions et requêtes
+@profiling.cached(st.cache_resource)
+def get_collection():
+    client = CLIENT if CLIENT is not None else MongoClient(MONGO_URI, maxPoolSize=POOL_SIZE)
+    return client[DB_NAME][COLLECTION_NAME]
+
+
+# Agrégats (pays, jour) tenus à jour à l'écriture : lus à la place des ventes brutes
+@profiling.cached(st.cache_resource)
+def get_summary():
+    return summary_of(get_collection())
+
+
+# Rendus (cartes, figures) partagés par toutes les sessions et tous les dashboards, bornés en octets.
+# Chaque draw_* a son nom de rendu et met dans la clé tout ce qui change le résultat (taille, fond)
+@st.cache_resource
+def render_cache():
+    return RenderCache()
+
+
+# Mode incrémental : un seul cache par processus, complété par les nouveaux documents
+@profiling.cached(st.cache_resource)
+def get_incremental_sales():
+    return IncrementalSales(get_collection(), snapshot=SNAPSHOT_PATH)
+
+
+@profiling.timed
+def incremental_sales():
+    sales = get_incremental_sales()
+    sales.refresh_if_due(REFRESH_SECONDS)
+    return sales
+
+
+# Sinon les agrégats sont lus dans le résumé MongoDB ; seules les lignes du tableau sont chargées
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_countries():
+    return fetch_summary_countries(get_summary())
+
+
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_country_stats(countries: tuple, start=None, end=None):
+    return fetch_summary_stats(get_summary(), countries, start, end)
+
+
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_region_stats(start=None, end=None):
+    return region_totals(fetch_summary_stats(get_summary(), start=start, end=end), REGION_PRESETS)
+
+
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_detail_page(countries: tuple, after, start=None, end=None):
+    return fetch_detail_page(get_collection(), countries, after, start=start, end=end)
+
+
+# Cube (pays × jour) lu dans le résumé : partagé sans copie, il alimente séries et filtre de dates
+@profiling.cached(st.cache_resource(ttl=REFRESH_SECONDS))
+def query_cube():
+    return RollupCube.from_daily(fetch_summary_daily(get_summary()))
+
+
+# Résumé pas encore construit (summary.py --rebuild) : pas de cube, agrégats lus sur les ventes brutes
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_has_summary() -> bool:
+    return get_summary().find_one({}, {"_id": 1}) is not None
+
+
+def has_cube() -> bool:
+    return INCREMENTAL or query_has_summary()
+
+
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_raw_countries():
+    return fetch_countries(get_collection())
+
+
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_raw_stats(countries: tuple, start=None, end=None):
+    return fetch_country_stats(get_collection(), countries, start, end)
+
+
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_raw_region_stats(start=None, end=None):
+    return fetch_region_stats(get_collection(), REGION_PRESETS, start=start, end=end)
+
+
+# Mode approché, sans cube seulement : tirage $sample de la collection brute, renouvelé à chaque expiration
+@profiling.cached(st.cache_resource(ttl=REFRESH_SECONDS))
+def query_sample():
+    return fetch_sample(get_collection())
+
+
+@profiling.timed
+def load_countries():
+    if INCREMENTAL:
+        return incremental_sales().countries()
+    if not query_has_summary():
+        return query_raw_countries()
+    return query_countries()
+
+
+@profiling.timed
+def load_country_stats(countries: tuple, start=None, end=None, approximate=False):
+    # approximate (sans cube) : estimations sur échantillon avec leurs intervalles (colonnes *_err)
+    if INCREMENTAL:
+        stats = incremental_sales().country_stats(countries, start, end)
+    elif query_has_summary():
+        stats = query_country_stats(countries, start, end)
+    elif approximate:
+        stats = query_sample().stats(countries, start, end)
+    else:
+        stats = query_raw_stats(countries, start, end)
+    stats["ISO_A3"] = stats["country"].map(ISO_MAP)
+    return stats
+
+
+@profiling.timed
+def load_region_stats(start=None, end=None):
+    if INCREMENTAL:
+        return incremental_sales().region_stats(REGION_PRESETS, start=start, end=end)
+    if not query_has_summary():
+        return query_raw_region_stats(start, end)
+    return query_region_stats(start, end)
+
+
+def build_export(countries: tuple, fmt: str, start=None, end=None):
+    # Appelé seulement au clic : lots lus sur le store ou le curseur, écrits au fil de l'eau
+    if INCREMENTAL:
+        batches = incremental_sales().detail_batches(countries, start, end)
+    else:
+        batches = mongo_batches(get_collection(), countries, start, end)
+    return export_file(batches, fmt)
+
+
+@profiling.timed
+def load_detail_page(countries: tuple, after=None, start=None, end=None):
+    # Une page de PAGE_SIZE lignes et la clé keyset de la suivante
+    if INCREMENTAL:
+        return incremental_sales().detail_page(countries, after, start=start, end=end)
+    return query_detail_page(countries, after, start, end)
+
+
+@profiling.timed
+def load_cube():
+    if INCREMENTAL:
+        return incremental_sales().cube
+    return query_cube()
+
+
+@profiling.cached(st.cache_resource)
+def load_geometry(path=GEOJSON_PATH, zoom=MAP_ZOOM):
+    # Géométrie découpée aux pays d'ISO_MAP, simplifiée et quantifiée pour le zoom de la carte.
+    # Chaîne JSON immuable, sérialisée une fois et partagée par toutes les sessions
+    return prepared_geometry(ISO_MAP.values(), zoom, path)
+
+
+# Mode navigateur : le cube (pays × jour) et la géométrie sont envoyés une seule fois
+@profiling.cached(st.cache_resource(max_entries=2))
+def client_html(version: int, _cube):
+    from client_view import render_client_dashboard
+    return render_client_dashboard(_cube, load_geometry(), REGION_PRESETS, ISO_MAP, zoom=MAP_ZOOM)
+
+
+@profiling.cached(st.cache_data(ttl=REFRESH_SECONDS))
+def query_client_html():
+    from client_view import render_client_dashboard
+    return render_client_dashboard(query_cube(), load_geometry(), REGION_PRESETS, ISO_MAP, zoom=MAP_ZOOM)
+
+
+@profiling.timed
+def load_client_html():
+    if INCREMENTAL:
+        sales = incremental_sales()
+        return client_html(sales.version, sales.cube)
+    return query_client_html()
+
+
+# ─── FILTRES ET PAGINATION ──────────────────────────────────────────────────────
+def country_filter(pays: list) -> list:
+    # Sidebar : presets + multiselect ; aucun pays sélectionné -> agrégats et tableau vides
+    st.sidebar.header("Filtres")
+    preset = st.sidebar.selectbox("Choisir un preset de région", list(REGION_PRESETS.keys()), index=0)
+    preset_list = REGION_PRESETS[preset]
+    default_countries = [c for c in preset_list if c in pays] if preset_list else []
+    return st.sidebar.multiselect("Pays", pays, default=default_countries)
+
+
+def date_range_filter(cube):
+    # Plage [début, fin) au jour près, bornée aux données ; (None, None) si la base est vide
+    if cube.n_days == 0:
+        return None, None
+    first, last = cube.days[0].item(), cube.days[-1].item()
+    picked = st.sidebar.date_input("Période", (first, last), min_value=first, max_value=last)
+    if len(picked) != 2:
+        picked = (first, last)
+    return datetime.combine(picked[0], time()), datetime.combine(picked[1] + timedelta(days=1), time())
+
+
+def approximate_toggle() -> bool:
+    # Proposé seulement sans cube : avec un cube, la requête exacte est plus rapide que l'estimation
+    if has_cube():
+        return False
+    approximate = st.sidebar.toggle("Résultats approchés", value=False,
+                                    help=f"Résumé sales_daily absent : totaux et moyennes estimés sur un "
+                                         f"échantillon plutôt que sur toutes les ventes, {CONFIDENCE_LABEL} "
+                                         "dans les infobulles ; désactiver pour les valeurs exactes")
+    if approximate:
+        st.caption(f"Valeurs estimées sur un échantillon : {CONFIDENCE_LABEL} dans les infobulles.")
+    return approximate
+
+
+def detail_cursor(countries: tuple, start=None, end=None, key="detail"):
+    # Pagination keyset : on garde la clé de fin de chaque page visitée, jamais tout le résultat.
+    # Retourne la clé de départ de la page courante (None : première page)
+    state = st.session_state.setdefault(key, {"filters": None, "keys": [None]})
+    if state["filters"] != (countries, start, end):
+        state.update(filters=(countries, start, end), keys=[None])
+    return state["keys"][-1]
+
+
+# ─── FONCTIONS DE VISUALISATION ─────────────────────────────────────────────────
+# plotly et folium sont importés par les fonctions qui s'en servent (voir warmup.py)
+@profiling.timed
+def draw_bar_by_country(stats: pd.DataFrame, key: tuple, width=None, height=None):
+    # Sans taille : largeur du conteneur
+    from figures import bar_by_country_figure
+    fig = render_cache().get_or_render("draw_bar_by_country", (*key, width, height),
+                                       lambda: bar_by_country_figure(stats, width, height), figure_bytes)
+    profiling.record_payload("draw_bar_by_country", lambda: len(fig.to_json()))
+    st.plotly_chart(fig, width="stretch" if width is None else "content")
+
+
+@profiling.timed
+def draw_region_bar(region_stats: pd.DataFrame, key: tuple):
+    from figures import region_bar_figure
+    fig = render_cache().get_or_render("draw_region_bar", key, lambda: region_bar_figure(region_stats), figure_bytes)
+    profiling.record_payload("draw_region_bar", lambda: len(fig.to_json()))
+    st.plotly_chart(fig, width="stretch")
+
+
+@profiling.timed
+def draw_radar_chart(stats: pd.DataFrame, countries: list, key: tuple):
+    if not countries:
+        st.info("Sélectionnez des pays pour afficher le radar chart.")
+        return
+    from figures import radar_figure
+    # L'ordre de la sélection fixe celui des axes : il fait partie de la clé
+    fig = render_cache().get_or_render("draw_radar_chart", (tuple(countries), *key),
+                                       lambda: radar_figure(stats, countries), figure_bytes)
+    profiling.record_payload("draw_radar_chart", lambda: len(fig.to_json()))
+    st.plotly_chart(fig, width="stretch")
+
+
+@profiling.timed
+def draw_time_series(series: pd.DataFrame, by: str, freq: str, key: tuple):
+    if series.empty:
+        st.info("Sélectionnez des pays pour afficher l'évolution des ventes.")
+        return
+    from figures import time_series_figure
+    fig = render_cache().get_or_render("draw_time_series", (*key, by, freq), lambda: time_series_figure(series, by, freq), figure_bytes)
+    profiling.record_payload("draw_time_series", lambda: len(fig.to_json()))
+    st.plotly_chart(fig, width="stretch")
+
+
+def marker_map(stats: pd.DataFrame):
+    # Une passe vectorisée : coordonnées jointes depuis la dimension pays, rayon et popup calculés
+    # dans le navigateur à partir des colonnes ; retourne une folium.Map
+    import folium
+    from maplayers import StatsMarkers, points_payload
+    fields = ["country", "total", "transactions", "average", "maximum"]
+    aliases = ["Pays", "Total vendu :", "Transactions :", "Moyenne :", "Maximum :"]
+    if "total_err" in stats:
+        fields += ["total_ci", "average_ci"]
+        aliases += [f"{CONFIDENCE_LABEL} total :", f"{CONFIDENCE_LABEL} moyenne :"]
+    points = with_intervals(stats).join(COUNTRY_DIM[["lat", "lon"]], on="country", how="inner")
+    m = folium.Map(location=(54, 15), zoom_start=MAP_ZOOM)
+    StatsMarkers(
+        points_payload(points, fields),
+        fields=fields,
+        aliases=aliases,
+        radius_field="total",
+        radius_scale=4,
+        unit="pommes",
+        name="Ventes",
+    ).add_to(m)
+    folium.LayerControl().add_to(m)
+    return m
+
+
+# Pages HTML complètes des cartes, rendues une fois par sélection et servies depuis le cache ensuite
+@profiling.timed
+def draw_marker_map(stats: pd.DataFrame, key: tuple, width=1000, map_height=800):
+    html = render_cache().get_or_render("draw_marker_map", key, lambda: marker_map(stats).get_root().render())
+    profiling.record_payload("draw_marker_map", len(html))
+    st.iframe(html, width=width, height=map_height)
+
+
+@profiling.timed
+def draw_choropleth_map(stats: pd.DataFrame, key: tuple, width=1000, map_height=800, tiles="OpenStreetMap"):
+    from figures import choropleth_map
+    html = render_cache().get_or_render("draw_choropleth_map", (*key, tiles),
+                                        lambda: choropleth_map(stats, load_geometry(), MAP_ZOOM, tiles).get_root().render())
+    profiling.record_payload("draw_choropleth_map", len(html))
+    st.iframe(html, width=width, height=map_height)
+
+
+@profiling.timed
+def draw_detail_table(page: pd.DataFrame, next_key, total: int, key="detail"):
+    state = st.session_state[key]
+    st.dataframe(page, width="stretch", hide_index=True)
+
+    prev_col, info_col, next_col = st.columns((1, 2, 1))
+    prev_col.button("◀", key=f"{key}_prev", disabled=len(state["keys"]) == 1,
+                    on_click=state["keys"].pop)
+    info_col.caption(f"Page {len(state['keys'])} / {max(1, math.ceil(total / PAGE_SIZE))} — {total} ventes")
+    next_col.button("▶", key=f"{key}_next", disabled=next_key is None,
+                    on_click=state["keys"].append, args=(next_key,))
+
+
+@profiling.timed
+def draw_export(countries: tuple, start=None, end=None):
+    # Export paresseux : rien n'est construit tant que personne ne clique
+    fmt = st.radio("Format d'export", list(EXPORT_FORMATS), horizontal=True)
+    mime, suffix = EXPORT_FORMATS[fmt]
+    st.download_button(f"Télécharger {fmt.upper()}", lambda: build_export(countries, fmt, start, end),
+                       f"sales_export{suffix}", mime, on_click="ignore")
+
+
+@profiling.timed
+def draw_client_dashboard():
+    st.caption("Le tableau détaillé et l'export CSV restent disponibles en mode serveur.")
+    html = load_client_html()
+    profiling.record_payload("client_html", len(html))
+    st.iframe(html, height=1200)
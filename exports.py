@@ -0,0 +1,125 @@
+"""Exporte les ventes filtrées en CSV, CSV gzip ou Parquet, par lots.
+
+Usage : python exports.py OUT [--format csv|csv.gz|parquet] [--countries PAYS ...] [--uri URI]
+
+Les lignes sont lues par lots depuis le curseur MongoDB (ou le SalesStore) et
+écrites au fil de l'eau : la mémoire utilisée ne dépend que de la taille d'un lot.
+"""
+import argparse
+import functools
+import gzip
+import io
+import tempfile
+from contextlib import nullcontext
+from itertools import islice
+
+from pymongo import MongoClient
+
+from loader import BATCH_SIZE, PROJECTION, frame_from_documents
+from queries import DETAIL_COLUMNS, build_match
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MONGO_URI       = "mongodb://127.0.0.1:27017/"
+DB_NAME         = "appleSales"
+COLLECTION_NAME = "sales"
+# {format: (type MIME, extension)}
+EXPORT_FORMATS  = {
+    "csv":     ("text/csv", ".csv"),
+    "csv.gz":  ("application/gzip", ".csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+# Au-delà, le fichier temporaire passe de la mémoire au disque
+SPOOL_BYTES     = 16 * 2**20
+
+
+# pyarrow n'est importé qu'au premier export Parquet : les dashboards démarrent sans lui
+@functools.cache
+def parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("purchaseDate", pa.timestamp("ms")),
+        ("quantity",     pa.int32()),
+        ("country",      pa.string()),
+    ])
+
+
+# ─── SOURCES PAR LOTS ───────────────────────────────────────────────────────────
+def mongo_batches(collection, countries=None, start=None, end=None, batch_size=BATCH_SIZE):
+    # Lots de `batch_size` lignes lus directement sur le curseur, triés par date
+    cursor = collection.find(build_match(countries, start, end), PROJECTION,
+                             sort=[("purchaseDate", 1)], batch_size=batch_size)
+    while True:
+        docs = list(islice(cursor, batch_size))
+        if not docs:
+            return
+        yield frame_from_documents(docs)[DETAIL_COLUMNS]
+
+
+def store_batches(store, idx, batch_size=BATCH_SIZE):
+    # `idx` : indices déjà ordonnés (SalesStore.select) ; seul un lot est matérialisé à la fois
+    for i in range(0, len(idx), batch_size):
+        yield store.take(idx[i:i + batch_size])[DETAIL_COLUMNS]
+
+
+# ─── ÉCRITURE ───────────────────────────────────────────────────────────────────
+def _write_csv(out, batches) -> int:
+    rows = 0
+    for batch in batches:
+        out.write(batch.to_csv(index=False, header=rows == 0).encode("utf-8"))
+        rows += len(batch)
+    if rows == 0:
+        out.write((",".join(DETAIL_COLUMNS) + "\n").encode("utf-8"))
+    return rows
+
+
+def _write_parquet(out, batches) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    rows = 0
+    schema = parquet_schema()
+    with pq.ParquetWriter(out, schema) as writer:
+        for batch in batches:
+            # Un row group par lot ; les pays sont dictionnaire-encodés par Parquet
+            table = pa.Table.from_pandas(batch.astype({"country": str}), schema=schema,
+                                         preserve_index=False)
+            writer.write_table(table)
+            rows += len(batch)
+    return rows
+
+
+def write_export(out, batches, fmt: str = "csv") -> int:
+    """Écrit les lots dans le fichier binaire `out` au format `fmt` ; retourne le nombre de lignes."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    if fmt == "parquet":
+        return _write_parquet(out, batches)
+    wrapper = gzip.GzipFile(fileobj=out, mode="wb") if fmt == "csv.gz" else nullcontext(out)
+    with wrapper as target:
+        return _write_csv(target, batches)
+
+
+def export_file(batches, fmt: str = "csv") -> io.BufferedIOBase:
+    # Fichier temporaire rembobiné, prêt pour st.download_button ; déborde sur disque si volumineux
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    write_export(out, batches, fmt)
+    out.seek(0)
+    return out
+
+
+# ─── EXPORT EN LIGNE DE COMMANDE ────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--countries", nargs="*", help="pays à exporter (défaut : tous)")
+    parser.add_argument("--uri", default=MONGO_URI)
+    args = parser.parse_args()
+
+    collection = MongoClient(args.uri)[DB_NAME][COLLECTION_NAME]
+    with open(args.out, "wb") as out:
+        rows = write_export(out, mongo_batches(collection, args.countries), args.format)
+    print(f"✅ {rows:,} lignes exportées dans {args.out}")
+
+
+if __name__ == "__main__":
+    main()
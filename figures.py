@@ -0,0 +1,98 @@
+"""Construction des graphiques et de la carte, sans Streamlit.
+
+Partagé par les dashboards (draw_*) et le générateur de rapports : mêmes
+figures à l'écran et dans les fichiers produits.
+"""
+import folium
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from maplayers import StatsChoropleth, stats_payload
+from rollup import FREQ_LABELS
+from sampling import CONFIDENCE_LABEL, with_intervals
+
+REGION_COLORS = {"Nordiques": "crimson", "Europe de l'Ouest": "gray", "Autres": "lightgray"}
+
+
+# ─── GRAPHIQUES PLOTLY ──────────────────────────────────────────────────────────
+# Statistiques approchées (colonnes *_err, voir sampling.py) : barres d'erreur et intervalle au survol
+def bar_by_country_figure(stats: pd.DataFrame, width=None, height=None) -> go.Figure:
+    approximate = "total_err" in stats
+    fig = px.bar(
+        with_intervals(stats),
+        x="country",
+        y="total",
+        error_y="total_err" if approximate else None,
+        custom_data=["total_ci"] if approximate else None,
+        title="Ventes totales de pommes par pays" + (" (estimation)" if approximate else ""),
+        labels={"total": "Quantité vendue", "country": "Pays"},
+        width=width,
+        height=height
+    )
+    if approximate:
+        fig.update_traces(hovertemplate=f"Pays : %{{x}}<br>Quantité estimée : %{{y:,.0f}} "
+                                        f"%{{customdata[0]}} ({CONFIDENCE_LABEL})<extra></extra>")
+    return fig
+
+
+def region_bar_figure(region_stats: pd.DataFrame) -> go.Figure:
+    return px.bar(region_stats, x="region", y="total",
+                  title="Comparaison des ventes par région",
+                  color="region",
+                  color_discrete_map=REGION_COLORS)
+
+
+def radar_figure(stats: pd.DataFrame, countries: list) -> go.Figure:
+    agg = with_intervals(stats).set_index("country").reindex(countries)
+    r = agg["total"].tolist() + [agg["total"].tolist()[0]]
+    theta = countries + [countries[0]]
+    fig = go.Figure(data=go.Scatterpolar(r=r, theta=theta, fill="toself", marker=dict(color="firebrick")))
+    if "total_ci" in agg:
+        fig.update_traces(customdata=agg["total_ci"].tolist() + [agg["total_ci"].tolist()[0]],
+                          hovertemplate=f"%{{theta}} : %{{r:,.0f}} %{{customdata}} ({CONFIDENCE_LABEL})<extra></extra>")
+    fig.update_layout(polar=dict(radialaxis=dict(visible=True)),
+                      title="Radar chart des ventes (sélection)")
+    return fig
+
+
+def time_series_figure(series: pd.DataFrame, by: str, freq: str) -> go.Figure:
+    return px.line(series, x="period", y="total", color=by, markers=freq != "D",
+                   title=f"Ventes par {FREQ_LABELS[freq]}",
+                   labels={"period": "Période", "total": "Quantité vendue",
+                           by: "Pays" if by == "country" else "Région"})
+
+
+# ─── CARTE ──────────────────────────────────────────────────────────────────────
+def choropleth_map(stats: pd.DataFrame, geometry: str, zoom: int, tiles="OpenStreetMap") -> folium.Map:
+    # Seules les statistiques par ISO sont calculées ici ; la géométrie est partagée telle quelle
+    tooltip_fields = ['country', 'total', 'transactions', 'average', 'maximum']
+    aliases = ["Code ISO:", "Total vendu:", "Transactions:", "Moyenne:", "Maximum:"]
+    if "total_err" in stats:
+        # Estimations : intervalle dans l'infobulle, le maximum n'est que celui de l'échantillon
+        tooltip_fields += ["total_ci", "average_ci"]
+        aliases = ["Code ISO:", "Total estimé:", "Transactions estimées:", "Moyenne estimée:",
+                   "Max (échantillon):", f"{CONFIDENCE_LABEL} total:", f"{CONFIDENCE_LABEL} moyenne:"]
+    payload = stats_payload(
+        with_intervals(stats).assign(country=stats["ISO_A3"], average=stats["average"].round(1)), "ISO_A3", tooltip_fields
+    )
+
+    # Créer la carte
+    m = folium.Map(location=(54, 15), zoom_start=zoom, tiles=tiles)
+
+    # Choropleth pour le remplissage, tooltips calculés côté navigateur
+    StatsChoropleth(
+        geometry,
+        payload,
+        fields=tooltip_fields,
+        aliases=aliases,
+        value_field="total",
+        name="Ventes de pommes",
+        fill_color="YlOrRd",
+        fill_opacity=0.7,
+        line_opacity=0.2,
+        legend_name="Total de pommes vendues"
+    ).add_to(m)
+
+    folium.LayerControl().add_to(m)
+    return m
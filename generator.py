@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+# Pays d'Europe en français, pondérés par leur population (millions d'habitants)
+COUNTRY_WEIGHTS = {
+    "Albanie": 2.8, "Andorre": 0.08, "Autriche": 9.1, "Biélorussie": 9.2, "Belgique": 11.8,
+    "Bosnie-Herzégovine": 3.2, "Bulgarie": 6.4, "Croatie": 3.9, "Chypre": 1.3,
+    "République tchèque": 10.9, "Danemark": 5.9, "Estonie": 1.4, "Finlande": 5.6,
+    "France": 68.4, "Allemagne": 84.5, "Grèce": 10.4, "Hongrie": 9.6, "Islande": 0.39,
+    "Irlande": 5.3, "Italie": 59.0, "Kosovo": 1.6, "Lettonie": 1.9, "Liechtenstein": 0.04,
+    "Lituanie": 2.9, "Luxembourg": 0.67, "Malte": 0.55, "Moldavie": 2.5, "Monaco": 0.04,
+    "Monténégro": 0.62, "Pays-Bas": 17.9, "Macédoine du Nord": 1.8, "Norvège": 5.5,
+    "Pologne": 36.6, "Portugal": 10.6, "Roumanie": 19.0, "Saint-Marin": 0.03, "Serbie": 6.6,
+    "Slovaquie": 5.4, "Slovénie": 2.1, "Espagne": 48.6, "Suède": 10.6, "Suisse": 8.9,
+    "Ukraine": 37.0, "Royaume-Uni": 68.3,
+}
+COUNTRIES = list(COUNTRY_WEIGHTS)
+
+START          = "2025-01-01"
+END            = "2026-01-01"
+# Saisonnalité : amplitude relative et jour de l'année du pic (récolte d'automne)
+SEASONALITY    = 0.35
+PEAK_DAY       = 280
+# Activité relative du lundi au dimanche
+WEEKDAY_WEIGHTS = [0.9, 0.9, 0.95, 1.0, 1.15, 1.4, 0.7]
+# Activité relative par heure (0 h à 23 h)
+HOUR_WEIGHTS = [0.1, 0.05, 0.05, 0.05, 0.05, 0.1, 0.3, 0.6, 0.9, 1.0, 1.1, 1.3,
+                1.4, 1.2, 1.0, 1.0, 1.2, 1.5, 1.6, 1.3, 0.9, 0.6, 0.3, 0.2]
+# Quantités à queue lourde (Pareto/Lomax) : la plupart des achats sont petits,
+# quelques commandes de gros dépassent la centaine
+QUANTITY_ALPHA = 2.2
+QUANTITY_SCALE = 6.0
+MAX_QUANTITY   = 5_000
+
+
+# ─── LOIS DE TIRAGE ─────────────────────────────────────────────────────────────
+def day_weights(start=START, end=END, seasonality=SEASONALITY, peak_day=PEAK_DAY) -> tuple:
+    # (jours, probabilités) : saison annuelle × profil hebdomadaire
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D"))
+    if not len(days):
+        raise ValueError(f"plage de dates vide : {start} -> {end}")
+    doy = (days - days.astype("datetime64[Y]")).astype(np.int64)
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 était un jeudi
+    w = (1 + seasonality * np.cos(2 * np.pi * (doy - peak_day) / 365.25)) * np.asarray(WEEKDAY_WEIGHTS)[weekday]
+    return days, w / w.sum()
+
+
+def _probabilities(weights) -> np.ndarray:
+    p = np.asarray(weights, dtype=float)
+    return p / p.sum()
+
+
+# ─── GÉNÉRATION ─────────────────────────────────────────────────────────────────
+def generate_arrays(rows: int, seed=None, start=START, end=END, weights=None,
+                    seasonality=SEASONALITY, peak_day=PEAK_DAY,
+                    quantity_alpha=QUANTITY_ALPHA, quantity_scale=QUANTITY_SCALE) -> dict:
+    """Tire `rows` ventes en colonnes NumPy : dates, codes pays et quantités.
+
+    `weights` ({pays: poids}) fixe les pays et leur volume relatif ; `seed` peut
+    être un entier ou une séquence (graine, numéro de paquet).
+    """
+    weights = COUNTRY_WEIGHTS if weights is None else weights
+    rng = np.random.default_rng(seed)
+    days, p_day = day_weights(start, end, seasonality, peak_day)
+
+    day = days[rng.choice(len(days), rows, p=p_day)].astype("datetime64[m]")
+    hour = rng.choice(24, rows, p=_probabilities(HOUR_WEIGHTS))
+    minute = hour * 60 + rng.integers(0, 60, rows)
+    quantity = 1 + np.floor(rng.pareto(quantity_alpha, rows) * quantity_scale)
+    return {
+        "categories":   list(weights),
+        "codes":        rng.choice(len(weights), rows, p=_probabilities(list(weights.values()))).astype(np.int16),
+        "purchaseDate": (day + minute.astype("timedelta64[m]")).astype("datetime64[ms]"),
+        "quantity":     np.minimum(quantity, MAX_QUANTITY).astype(np.int16),
+    }
+
+
+def sales_frame(rows: int, seed=None, **options) -> pd.DataFrame:
+    # Même schéma que loader.load_sales : fixture en mémoire pour les benchmarks
+    arrays = generate_arrays(rows, seed, **options)
+    return pd.DataFrame({
+        "purchaseDate": arrays["purchaseDate"],
+        "quantity":     arrays["quantity"],
+        "country":      pd.Categorical.from_codes(arrays["codes"], categories=arrays["categories"]),
+    })
+
+
+def sales_documents(rows: int, seed=None, **options) -> list:
+    # Documents prêts pour insert_many ; la conversion en objets Python se fait en bloc
+    arrays = generate_arrays(rows, seed, **options)
+    names = np.asarray(arrays["categories"], dtype=object)[arrays["codes"]]
+    return [
+        {"purchaseDate": d, "country": c, "quantity": q}
+        for d, c, q in zip(arrays["purchaseDate"].tolist(), names.tolist(), arrays["quantity"].tolist())
+    ]
@@ -0,0 +1,194 @@
+import argparse
+import json
+import math
+import os
+from functools import lru_cache
+
+import numpy as np
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+GEOJSON_PATH = "countriesgeo.json"
+# Tolérance de simplification (degrés) par niveau de zoom Leaflet
+ZOOM_TOLERANCES = {2: 0.2, 3: 0.1, 4: 0.05, 5: 0.02, 6: 0.01, 7: 0.005}
+# Résolution de la grille TopoJSON (nombre de pas par axe)
+TOPO_QUANTIZATION = 10_000
+
+
+def tolerance_for_zoom(zoom: int) -> float:
+    zooms = sorted(ZOOM_TOLERANCES)
+    zoom = min(max(zoom, zooms[0]), zooms[-1])
+    return ZOOM_TOLERANCES[zoom]
+
+
+def decimals_for(tolerance: float) -> int:
+    # Grille de quantification dix fois plus fine que la tolérance de simplification
+    return max(0, math.ceil(-math.log10(tolerance / 10)))
+
+
+# ─── SIMPLIFICATION (Douglas-Peucker) ───────────────────────────────────────────
+def simplify_line(points: np.ndarray, tolerance: float) -> np.ndarray:
+    n = len(points)
+    if n <= 2:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = points[first], points[last]
+        seg = points[first + 1:last]
+        ab = b - a
+        norm = np.hypot(*ab)
+        if norm == 0:
+            dist = np.hypot(*(seg - a).T)
+        else:
+            dist = np.abs(ab[0] * (seg[:, 1] - a[1]) - ab[1] * (seg[:, 0] - a[0])) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = first + 1 + i
+            keep[mid] = True
+            stack.append((first, mid))
+            stack.append((mid, last))
+    return points[keep]
+
+
+def simplify_ring(ring, tolerance: float, decimals: int):
+    points = simplify_line(np.asarray(ring, dtype=float), tolerance)
+    points = np.round(points, decimals)
+    # Supprime les sommets devenus identiques après arrondi
+    points = points[np.r_[True, np.any(points[1:] != points[:-1], axis=1)]]
+    if len(points) < 4:
+        return None
+    return points.tolist()
+
+
+def simplify_polygon(rings, tolerance: float, decimals: int):
+    out = [simplify_ring(r, tolerance, decimals) for r in rings]
+    # Un contour extérieur effondré fait disparaître le polygone (petites îles)
+    if out[0] is None:
+        return None
+    return [r for r in out if r is not None]
+
+
+def simplify_geometry(geometry: dict, tolerance: float, decimals: int):
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    else:
+        polygons = geometry["coordinates"]
+    kept = [p for p in (simplify_polygon(p, tolerance, decimals) for p in polygons) if p]
+    if not kept:
+        # On garde au moins le plus grand polygone, même à faible zoom
+        largest = max(polygons, key=lambda p: len(p[0]))
+        kept = [[np.round(np.asarray(largest[0], dtype=float), decimals).tolist()]]
+    if len(kept) == 1:
+        return {"type": "Polygon", "coordinates": kept[0]}
+    return {"type": "MultiPolygon", "coordinates": kept}
+
+
+# ─── PRÉPARATION ────────────────────────────────────────────────────────────────
+def clip_features(geojson: dict, iso_codes) -> dict:
+    iso_codes = set(iso_codes)
+    return {
+        "type": "FeatureCollection",
+        "features": [f for f in geojson["features"] if f.get("id") in iso_codes],
+    }
+
+
+def simplify_features(geojson: dict, tolerance: float) -> dict:
+    decimals = decimals_for(tolerance)
+    return {
+        "type": "FeatureCollection",
+        "features": [{
+            "type":       "Feature",
+            "id":         f["id"],
+            "properties": {"name": f["properties"].get("name")},
+            "geometry":   simplify_geometry(f["geometry"], tolerance, decimals),
+        } for f in geojson["features"]],
+    }
+
+
+def to_topojson(geojson: dict, quantization: int = TOPO_QUANTIZATION) -> dict:
+    # TopoJSON quantifié et delta-encodé ; un arc par anneau (pas de partage de frontières)
+    coords = np.array([pt for f in geojson["features"] for ring in _rings(f["geometry"]) for pt in ring])
+    x0, y0 = coords.min(axis=0)
+    x1, y1 = coords.max(axis=0)
+    kx = (x1 - x0) / (quantization - 1) or 1.0
+    ky = (y1 - y0) / (quantization - 1) or 1.0
+
+    arcs, geometries = [], []
+    for f in geojson["features"]:
+        polygons = []
+        for polygon in _polygons(f["geometry"]):
+            refs = []
+            for ring in polygon:
+                q = np.round((np.asarray(ring) - (x0, y0)) / (kx, ky)).astype(np.int64)
+                delta = np.vstack([q[:1], np.diff(q, axis=0)])
+                refs.append([len(arcs)])
+                arcs.append(delta.tolist())
+            polygons.append(refs)
+        geometry = {"type": "Polygon", "arcs": polygons[0]} if len(polygons) == 1 \
+            else {"type": "MultiPolygon", "arcs": polygons}
+        geometries.append({**geometry, "id": f["id"], "properties": f["properties"]})
+
+    return {
+        "type":      "Topology",
+        "transform": {"scale": [kx, ky], "translate": [x0, y0]},
+        "objects":   {"countries": {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs":      arcs,
+    }
+
+
+def _polygons(geometry: dict):
+    return [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+
+
+def _rings(geometry: dict):
+    return [ring for polygon in _polygons(geometry) for ring in polygon]
+
+
+def dumps(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+# ─── CACHE ──────────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=None)
+def _source(path: str, mtime: float) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=32)
+def _prepared_text(path: str, mtime: float, iso_codes: frozenset, tolerance: float, fmt: str) -> str:
+    geojson = simplify_features(clip_features(_source(path, mtime), iso_codes), tolerance)
+    return dumps(to_topojson(geojson) if fmt == "topojson" else geojson)
+
+
+def prepared_geometry(iso_codes, zoom: int = 4, path: str = GEOJSON_PATH, fmt: str = "geojson") -> str:
+    """Géométrie découpée aux pays utiles, simplifiée pour `zoom`, déjà sérialisée.
+
+    Le résultat est mis en cache par (fichier, date de modification, pays, tolérance).
+    """
+    return _prepared_text(path, os.path.getmtime(path), frozenset(iso_codes), tolerance_for_zoom(zoom), fmt)
+
+
+# ─── PRÉCALCUL SUR DISQUE ───────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Précalcule les géométries simplifiées par niveau de zoom.")
+    parser.add_argument("--source", default=GEOJSON_PATH)
+    parser.add_argument("--out", default="geo")
+    parser.add_argument("--iso", nargs="*", help="codes ISO A3 à conserver (défaut : tous)")
+    args = parser.parse_args()
+
+    with open(args.source, encoding="utf-8") as f:
+        iso = args.iso or [feat["id"] for feat in json.load(f)["features"]]
+    os.makedirs(args.out, exist_ok=True)
+    print(f"source : {os.path.getsize(args.source):>9,} octets")
+    for zoom in sorted(ZOOM_TOLERANCES):
+        for fmt in ("geojson", "topojson"):
+            text = prepared_geometry(iso, zoom, args.source, fmt)
+            target = os.path.join(args.out, f"countries_z{zoom}.{fmt}")
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"zoom {zoom} {fmt:<8} : {len(text):>9,} octets -> {target}")
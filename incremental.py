@@ -0,0 +1,197 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from bson import ObjectId
+
+from exports import store_batches
+from loader import frame_from_documents, load_sales_columns
+from queries import DETAIL_COLUMNS, PAGE_SIZE, STATS_COLUMNS
+from rollup import RollupCube
+from snapshot import MAX_AGE, is_fresh, read_snapshot, read_stamp, write_snapshot
+from store import SalesStore
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+# Les ObjectId ne sont croissants qu'à la seconde près entre écrivains concurrents :
+# on ne fait avancer le high-water mark qu'au-delà de ce délai
+SAFETY_LAG = timedelta(seconds=5)
+
+
+# ─── CACHE INCRÉMENTAL ──────────────────────────────────────────────────────────
+class IncrementalSales:
+    """Données de ventes en mémoire, rafraîchies par deltas plutôt que rechargées.
+
+    Le mode par défaut relit les documents dont l'`_id` est au-delà du dernier
+    high-water mark ; avec `use_change_stream=True`, les insertions sont lues
+    depuis un change stream (replica set requis). Toute autre opération
+    (suppression, mise à jour, drop) provoque un rechargement complet.
+
+    Avec `snapshot` (chemin écrit par snapshot.py), l'instantané disque est
+    mappé en mémoire tant qu'il a moins de `max_age` ; MongoDB n'est interrogé
+    qu'au-delà, en reprenant les deltas depuis la version de l'instantané.
+    """
+
+    def __init__(self, collection, use_change_stream=False, lag=SAFETY_LAG, snapshot=None, max_age=MAX_AGE):
+        if snapshot is not None and use_change_stream:
+            raise ValueError("Un instantané disque ne se combine pas avec le change stream")
+        self.collection = collection
+        self.use_change_stream = use_change_stream
+        self.lag = lag
+        self.snapshot = snapshot
+        self.max_age = max_age
+        # Remplacé d'un bloc à chaque rafraîchissement : les lecteurs n'ont pas besoin du verrou
+        self.store = None
+        self.cube = None
+        self.version = 0
+        self.refreshed_at = 0.0
+        self._high_water = None
+        self._first_id = None
+        self._stamp = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    def _bound(self) -> ObjectId:
+        return ObjectId.from_datetime(datetime.now(timezone.utc) - self.lag)
+
+    def _fetch_range(self, low, high) -> pd.DataFrame:
+        match = {"_id": {"$lt": high}}
+        if low is not None:
+            match["_id"]["$gte"] = low
+        return load_sales_columns(self.collection, match)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self.store.frame()
+
+    def _reset(self, frame: pd.DataFrame, bound: ObjectId):
+        self.version += 1
+        self.store = SalesStore(frame, self.version)
+        self.cube = RollupCube.from_store(self.store)
+        self._high_water = bound
+        first = self.collection.find_one({}, {"_id": 1}, sort=[("_id", 1)])
+        self._first_id = first["_id"] if first else None
+
+    def _load_snapshot(self):
+        # Lignes chargées depuis l'instantané (0 : déjà à jour) ; None s'il faut passer par MongoDB
+        stamp = read_stamp(self.snapshot)
+        if stamp is None or not is_fresh(stamp, self.max_age):
+            return None
+        if stamp == self._stamp:
+            return 0
+        self.version += 1
+        self.store, self._stamp = read_snapshot(self.snapshot, self.version)
+        self.cube = RollupCube.from_store(self.store)
+        self._high_water = ObjectId(self._stamp["high_water"])
+        self._first_id = ObjectId(self._stamp["first_id"]) if self._stamp["first_id"] else None
+        return len(self.store)
+
+    def write_snapshot(self, path: str) -> dict:
+        # Données courantes et leur high-water mark, pour les lecteurs de snapshot.py
+        return write_snapshot(path, self.store, self._high_water, self._first_id)
+
+    def full_reload(self):
+        if self.use_change_stream:
+            if self._stream is not None:
+                self._stream.close()
+            # Ouvert avant la lecture complète pour ne perdre aucune insertion
+            self._stream = self.collection.watch(full_document="default")
+        bound = self._bound()
+        self._reset(self._fetch_range(None, bound), bound)
+
+    def _collection_replaced(self) -> bool:
+        # insertion.py fait un drop() : les anciens documents disparaissent
+        if self._first_id is None:
+            return False
+        return self.collection.find_one({"_id": self._first_id}, {"_id": 1}) is None
+
+    def _changes_from_stream(self):
+        docs = []
+        while True:
+            change = self._stream.try_next()
+            if change is None:
+                return docs
+            if change["operationType"] != "insert":
+                return None
+            doc = change["fullDocument"]
+            # Déjà couvert par le chargement complet
+            if doc["_id"] < self._high_water:
+                continue
+            docs.append(doc)
+
+    def refresh(self) -> int:
+        with self._lock:
+            return self._refresh()
+
+    def refresh_if_due(self, ttl: float):
+        # Test et rafraîchissement sous le même verrou : deux requêtes parallèles n'en lancent qu'un.
+        # Sans données, toujours dû : monotonic() peut être inférieur à ttl sur un hôte qui vient de démarrer
+        with self._lock:
+            if self.store is None or time.monotonic() - self.refreshed_at >= ttl:
+                self._refresh()
+
+    def _refresh(self) -> int:
+        if self.snapshot is not None:
+            loaded = self._load_snapshot()
+            if loaded is not None:
+                self.refreshed_at = time.monotonic()
+                return loaded
+
+        if self.store is None or self._collection_replaced():
+            self.full_reload()
+            self.refreshed_at = time.monotonic()
+            return len(self.store)
+
+        if self.use_change_stream:
+            docs = self._changes_from_stream()
+            if docs is None:
+                self.full_reload()
+                self.refreshed_at = time.monotonic()
+                return len(self.store)
+            new = frame_from_documents(docs)
+        else:
+            bound = self._bound()
+            new = self._fetch_range(self._high_water, bound)
+            self._high_water = bound
+
+        if len(new):
+            self.version += 1
+            self.cube = self.cube.merge(RollupCube.from_frame(new))
+            # Insertion dans les tranches des pays concernés : ni copie en DataFrame, ni tri des lignes existantes
+            self.store = self.store.merge(new, self.version)
+        self.refreshed_at = time.monotonic()
+        return len(new)
+
+    # ─── LECTURES ───────────────────────────────────────────────────────────────
+    def countries(self) -> list:
+        return self.store.countries()
+
+    def country_stats(self, countries=None, start=None, end=None) -> pd.DataFrame:
+        return self.cube.query(countries, start, end)[STATS_COLUMNS]
+
+    def region_stats(self, regions: dict, countries=None, start=None, end=None) -> pd.DataFrame:
+        return self.cube.region_totals(regions, countries, start, end)
+
+    def detail_rows(self, countries=None) -> pd.DataFrame:
+        store = self.store
+        return store.take(store.select(countries))
+
+    def detail_batches(self, countries=None, start=None, end=None):
+        # Lots chronologiques pour l'export ; l'instantané est figé au premier lot
+        store = self.store
+        return store_batches(store, store.select(countries, start, end))
+
+    def detail_page(self, countries=None, after=None, limit: int = PAGE_SIZE, start=None, end=None) -> tuple:
+        # (lignes, clé de la page suivante ou None) ; la clé porte la version de l'instantané
+        store = self.store
+        if after is None:
+            position = None
+        elif after[0] == store.version:
+            position = after[1:]
+        else:
+            # Instantané remplacé entre deux pages : reprise à la date de la clé
+            position = (after[1], -1)
+        idx = store.page(countries, position, limit + 1, start, end)
+        next_key = (store.version, *store.key(idx[limit - 1])) if len(idx) > limit else None
+        return store.take(idx[:limit])[DETAIL_COLUMNS], next_key
+
@@ -0,0 +1,182 @@
+"""Crée et vérifie les index de la collection des ventes.
+
+Usage : python indexes.py [--uri URI] [--drop] [--no-create]
+
+Après création, chaque requête réellement émise par les loaders (pages du
+détail, export, agrégats, distinct des pays) est passée à explain() pour
+plusieurs formes de filtre ; toute requête non couverte par un index est
+signalée. Les pages lisent leurs quelques documents (FETCH) mais ne doivent
+jamais trier en mémoire.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, IndexModel, MongoClient
+
+from loader import PROJECTION
+from queries import (build_match, country_stats_pipeline, daily_stats_pipeline, detail_page_query,
+                     fetch_countries, region_stats_pipeline)
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MONGO_URI       = "mongodb://127.0.0.1:27017/"
+DB_NAME         = "appleSales"
+COLLECTION_NAME = "sales"
+
+# Les deux premiers index contiennent les trois champs lus : agrégats et export
+# n'ont jamais à charger les documents. Pays en tête pour les filtres par pays
+# (et le distinct), date en tête pour les plages de dates sur tous les pays et le
+# tri de l'export. _id, placé avant quantity dans le premier, lui fait aussi
+# servir le tri (purchaseDate, _id) et le filtre keyset des pages du détail
+# filtrées par pays (fusion des bornes par pays, sans tri en mémoire) ; le
+# troisième sert les mêmes pages sans filtre par pays.
+INDEXES = [
+    IndexModel([("country", ASCENDING), ("purchaseDate", ASCENDING), ("_id", ASCENDING), ("quantity", ASCENDING)],
+               name="country_date_id_quantity"),
+    IndexModel([("purchaseDate", ASCENDING), ("country", ASCENDING), ("quantity", ASCENDING)],
+               name="date_country_quantity"),
+    IndexModel([("purchaseDate", ASCENDING), ("_id", ASCENDING)],
+               name="date_id"),
+]
+# Index des versions précédentes, remplacés ci-dessus : supprimés par ensure_indexes
+RETIRED_INDEXES = ["country_date_quantity", "country_date_id"]
+INDEX_NAMES = [m.document["name"] for m in INDEXES]
+SCAN_STAGES = {"IXSCAN", "DISTINCT_SCAN", "COUNT_SCAN"}
+
+
+# ─── GESTION DES INDEX ──────────────────────────────────────────────────────────
+def ensure_indexes(collection) -> list:
+    # Idempotent : un index existant avec la même définition est laissé tel quel
+    created = collection.create_indexes(INDEXES)
+    existing = collection.index_information()
+    for name in RETIRED_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+    return created
+
+
+def drop_indexes(collection):
+    existing = collection.index_information()
+    for name in INDEX_NAMES:
+        if name in existing:
+            collection.drop_index(name)
+
+
+# ─── FORMES DE REQUÊTES ─────────────────────────────────────────────────────────
+def sample_filters(collection) -> dict:
+    # Filtres représentatifs des dashboards : {libellé: (pays, début, fin)}
+    countries = fetch_countries(collection)[:3]
+    last = collection.find_one({"purchaseDate": {"$type": "date"}}, {"purchaseDate": 1},
+                               sort=[("purchaseDate", -1)])
+    end = last["purchaseDate"] if last else None
+    start = end - timedelta(days=30) if end else None
+    return {
+        "aucun":        (None, None, None),
+        "pays":         (countries, None, None),
+        "pays + dates": (countries, start, end),
+        "dates":        (None, start, end),
+    }
+
+
+def dashboard_queries(countries=None, start=None, end=None) -> dict:
+    # {nom: (type, spécification)} : mêmes requêtes que queries.py, exports.py et loader.py.
+    # « page suivante » reprend après une clé (date, _id), comme un clic sur ▶
+    regions = {"Sélection": list(countries or [])}
+    after = (start or datetime(1970, 1, 1), "0" * 24)
+    return {
+        "page détail":    ("page", detail_page_query(countries, None, start=start, end=end)),
+        "page suivante":  ("page", detail_page_query(countries, after, start=start, end=end)),
+        "export":         ("find", {"filter": build_match(countries, start, end), "projection": PROJECTION,
+                                    "sort": [("purchaseDate", 1)]}),
+        "stats pays":     ("aggregate", country_stats_pipeline(countries, start, end)),
+        "stats jour":     ("aggregate", daily_stats_pipeline(countries, start, end)),
+        "stats régions":  ("aggregate", region_stats_pipeline(regions, countries, start, end)),
+    }
+
+
+def run_query(collection, kind: str, spec) -> int:
+    if kind in ("find", "page"):
+        return sum(1 for _ in collection.find(spec["filter"], spec["projection"], sort=spec["sort"],
+                                              limit=spec.get("limit", 0)))
+    if kind == "distinct":
+        return len(collection.distinct(spec))
+    return sum(1 for _ in collection.aggregate(spec))
+
+
+def explain_query(collection, kind: str, spec) -> dict:
+    name = collection.name
+    if kind in ("find", "page"):
+        command = {"find": name, "filter": spec["filter"], "projection": spec["projection"],
+                   "sort": dict(spec["sort"])}
+        if "limit" in spec:
+            command["limit"] = spec["limit"]
+    elif kind == "distinct":
+        command = {"distinct": name, "key": spec, "query": {}}
+    else:
+        command = {"aggregate": name, "pipeline": spec, "cursor": {}}
+    return collection.database.command("explain", command, verbosity="queryPlanner")
+
+
+# ─── ANALYSE DES PLANS ──────────────────────────────────────────────────────────
+def _collect(node, key: str, out: list) -> list:
+    # Toutes les valeurs de `key` dans l'arbre (plans classiques et SBE, agrégats imbriqués)
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == key:
+                out.append(v)
+            _collect(v, key, out)
+    elif isinstance(node, list):
+        for v in node:
+            _collect(v, key, out)
+    return out
+
+
+def plan_summary(explain: dict, kind: str = "aggregate") -> dict:
+    # Pages : lecture des documents admise (limit), mais ni parcours complet ni tri en mémoire
+    plans = _collect(explain, "winningPlan", [])
+    stages = [s for s in _collect(plans, "stage", []) if isinstance(s, str)]
+    excluded = {"COLLSCAN", "SORT"} if kind == "page" else {"COLLSCAN", "FETCH"}
+    return {
+        "stages":  stages,
+        "indexes": sorted(set(_collect(plans, "indexName", []))),
+        "covered": bool(SCAN_STAGES & set(stages)) and not excluded & set(stages),
+    }
+
+
+def check_queries(collection) -> list:
+    # [(filtre, requête, résumé du plan)] pour toutes les formes de filtre
+    report = [("aucun", "pays (distinct)", plan_summary(explain_query(collection, "distinct", "country")))]
+    for label, args in sample_filters(collection).items():
+        for name, (kind, spec) in dashboard_queries(*args).items():
+            report.append((label, name, plan_summary(explain_query(collection, kind, spec), kind)))
+    return report
+
+
+# ─── POINT D'ENTRÉE ─────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--drop", action="store_true", help="supprime les index gérés ici puis quitte")
+    parser.add_argument("--no-create", action="store_true", help="vérifie sans créer les index")
+    args = parser.parse_args()
+
+    collection = MongoClient(args.uri)[DB_NAME][COLLECTION_NAME]
+    if args.drop:
+        drop_indexes(collection)
+        print(f"Index supprimés : {', '.join(INDEX_NAMES)}")
+        return
+    if not args.no_create:
+        print(f"Index présents : {', '.join(ensure_indexes(collection))}")
+
+    uncovered = 0
+    for label, name, plan in check_queries(collection):
+        uncovered += not plan["covered"]
+        print(f"{'✅' if plan['covered'] else '❌'} {name:<16} filtre {label:<13} "
+              f"{' > '.join(plan['stages']) or '?':<40} {', '.join(plan['indexes']) or '-'}")
+    if uncovered:
+        print(f"{uncovered} requête(s) non couverte(s) par un index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,166 @@
+"""Génère et charge les ventes de pommes dans appleSales.sales.
+
+Usage : python insertion.py [--rows N] [--chunk-size N] [--workers N] [--seed S]
+        python insertion.py --benchmark [--sizes 1000000 10000000 100000000]
+
+Les documents sont produits par paquets dans plusieurs processus et écrits en
+bulk non ordonné dans une collection de staging, renommée ensuite sur `sales`
+en une opération : les lecteurs voient l'ancienne collection jusqu'au bout.
+Chaque paquet renvoie ses agrégats (pays, jour) ; fusionnés, ils alimentent le
+résumé `sales_daily` par les mêmes upserts que les écritures courantes
+(voir summary.py).
+"""
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
 from pymongo import MongoClient
-from datetime import datetime, timedelta
-import random
-
-# 1) Connexion à MongoDB locale
-client = MongoClient("mongodb://localhost:27017/")
-db = client.appleSales
-sales = db.sales
-
-# 2) Pays d'Europe en français
-countries = [
-    "Albanie", "Andorre", "Autriche", "Biélorussie", "Belgique",
-    "Bosnie-Herzégovine", "Bulgarie", "Croatie", "Chypre",
-    "République tchèque", "Danemark", "Estonie", "Finlande",
-    "France", "Allemagne", "Grèce", "Hongrie", "Islande",
-    "Irlande", "Italie", "Kosovo", "Lettonie", "Liechtenstein",
-    "Lituanie", "Luxembourg", "Malte", "Moldavie", "Monaco",
-    "Monténégro", "Pays-Bas", "Macédoine du Nord", "Norvège",
-    "Pologne", "Portugal", "Roumanie", "Saint-Marin", "Serbie",
-    "Slovaquie", "Slovénie", "Espagne", "Suède", "Suisse",
-    "Ukraine", "Royaume-Uni"
-]
-
-# 3) Génération des documents pour 2025
-docs = []
-base_date = datetime(2025, 1, 1)
-
-for country in countries:
-    n_sales = random.randint(50, 150)
-    for _ in range(n_sales):
-        purchase_dt = base_date + timedelta(
-            days=random.randint(0, 364),
-            hours=random.randint(0, 23),
-            minutes=random.randint(0, 59)
-        )
-        docs.append({
-            "purchaseDate": purchase_dt,
-            "country":      country,
-            "quantity":     random.randint(1, 20)
-        })
-
-# 4) Réinitialisation + insertion en base
-sales.drop()
-res = sales.insert_many(docs)
-print(f"✅ Inséré {len(res.inserted_ids)} documents dans appleSales.sales")
+
+from generator import END, SEASONALITY, START, sales_documents
+from indexes import ensure_indexes
+from summary import apply_daily, combine_daily, daily_frame, ensure_summary_indexes, summary_name
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MONGO_URI       = "mongodb://localhost:27017/"
+DB_NAME         = "appleSales"
+COLLECTION_NAME = "sales"
+CHUNK_SIZE      = 50_000
+ROWS            = 5_000
+BENCH_SIZES     = [1_000_000, 10_000_000, 100_000_000]
+# Agrégats de paquets gardés avant fusion
+MERGE_EVERY     = 32
+
+
+# ─── PLAN DE GÉNÉRATION ─────────────────────────────────────────────────────────
+def plan_chunks(rows: int, chunk_size: int, seed=None, **options) -> list:
+    # Une tâche = ((graine, numéro), taille, options) : chaque processus tire son paquet
+    entropy = np.random.SeedSequence(seed).entropy
+    return [
+        ((entropy, i), min(chunk_size, rows - offset), options)
+        for i, offset in enumerate(range(0, rows, chunk_size))
+    ]
+
+
+# ─── ÉCRITURE ───────────────────────────────────────────────────────────────────
+_worker_collection = None
+
+
+def _init_worker(uri: str, db_name: str, collection_name: str):
+    # Un client par processus : MongoClient ne survit pas à un fork
+    global _worker_collection
+    _worker_collection = MongoClient(uri)[db_name][collection_name]
+
+
+def _insert_chunk(task) -> tuple:
+    # (documents insérés, agrégats (pays, jour) du paquet pour le résumé)
+    seed, size, options = task
+    docs = sales_documents(size, seed, **options)
+    _worker_collection.insert_many(docs, ordered=False)
+    return len(docs), daily_frame(docs)
+
+
+def _collect(results) -> tuple:
+    # (documents insérés, agrégats fusionnés) ; fusion au fil de l'eau pour borner la mémoire
+    inserted, parts = 0, []
+    for count, daily in results:
+        inserted += count
+        parts.append(daily)
+        if len(parts) >= MERGE_EVERY:
+            parts = [combine_daily(parts)]
+    return inserted, combine_daily(parts)
+
+
+def copy_indexes(source, target):
+    # Recrée sur la collection de staging les index secondaires de la cible
+    for name, info in source.index_information().items():
+        if name == "_id_":
+            continue
+        options = {k: v for k, v in info.items() if k not in ("key", "v", "ns")}
+        target.create_index(info["key"], name=name, **options)
+
+
+def bulk_load(uri: str, db_name: str, collection_name: str, tasks: list, workers: int) -> int:
+    """Charge `tasks` dans une collection de staging puis la renomme sur `collection_name`.
+
+    Le résumé (pays, jour) est construit à côté et renommé juste après. Retourne
+    le nombre de documents insérés. En cas d'erreur, les stagings sont
+    supprimées et les collections cibles restent intactes.
+    """
+    db = MongoClient(uri)[db_name]
+    staging_name = f"{collection_name}_staging_{os.getpid()}"
+    summary_staging = f"{summary_name(collection_name)}_staging_{os.getpid()}"
+    db.drop_collection(staging_name)
+    db.drop_collection(summary_staging)
+    try:
+        if workers > 1:
+            with Pool(workers, _init_worker, (uri, db_name, staging_name)) as pool:
+                inserted, daily = _collect(pool.imap_unordered(_insert_chunk, tasks))
+        else:
+            _init_worker(uri, db_name, staging_name)
+            inserted, daily = _collect(map(_insert_chunk, tasks))
+        # Au plus un upsert par (pays, jour), quel que soit le volume chargé
+        ensure_summary_indexes(db[summary_staging])
+        apply_daily(db[summary_staging], daily)
+        # Index construits une fois les données en place, plutôt qu'à chaque insertion
+        if collection_name in db.list_collection_names():
+            copy_indexes(db[collection_name], db[staging_name])
+        ensure_indexes(db[staging_name])
+        db[staging_name].rename(collection_name, dropTarget=True)
+        db[summary_staging].rename(summary_name(collection_name), dropTarget=True)
+    except BaseException:
+        db.drop_collection(staging_name)
+        db.drop_collection(summary_staging)
+        raise
+    return inserted
+
+
+# ─── BENCHMARK ──────────────────────────────────────────────────────────────────
+def benchmark(uri: str, sizes: list, chunk_size: int, workers: int, seed=None):
+    # Charge dans une collection jetable, jamais dans `sales`
+    target = f"{COLLECTION_NAME}_bench"
+    db = MongoClient(uri)[DB_NAME]
+    print(f"{'documents':>12} {'secondes':>9} {'docs/s':>12}   ({workers} processus, paquets de {chunk_size:,})")
+    try:
+        for rows in sizes:
+            tasks = plan_chunks(rows, chunk_size, seed)
+            t0 = time.perf_counter()
+            inserted = bulk_load(uri, DB_NAME, target, tasks, workers)
+            elapsed = time.perf_counter() - t0
+            print(f"{inserted:>12,} {elapsed:>9.1f} {inserted / elapsed:>12,.0f}")
+            db.drop_collection(target)
+            db.drop_collection(summary_name(target))
+    finally:
+        db.drop_collection(target)
+        db.drop_collection(summary_name(target))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--rows", type=int, default=ROWS, help="nombre total de documents")
+    parser.add_argument("--start", default=START, help="première date (incluse)")
+    parser.add_argument("--end", default=END, help="dernière date (exclue)")
+    parser.add_argument("--seasonality", type=float, default=SEASONALITY, help="amplitude saisonnière (0 = aucune)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--benchmark", action="store_true", help="mesure le débit en docs/s")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCH_SIZES)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.uri, args.sizes, args.chunk_size, args.workers, args.seed)
+        return
+
+    tasks = plan_chunks(args.rows, args.chunk_size, args.seed,
+                        start=args.start, end=args.end, seasonality=args.seasonality)
+    t0 = time.perf_counter()
+    inserted = bulk_load(args.uri, DB_NAME, COLLECTION_NAME, tasks, args.workers)
+    print(f"✅ Inséré {inserted:,} documents dans {DB_NAME}.{COLLECTION_NAME} "
+          f"en {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
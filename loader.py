@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+SALES_COLUMNS  = ["purchaseDate", "quantity", "country"]
+PROJECTION     = {"_id": 0, "purchaseDate": 1, "country": 1, "quantity": 1}
+BATCH_SIZE     = 50_000
+DATE_DTYPE     = "datetime64[ms]"
+CODE_DTYPE     = np.int16
+QUANTITY_DTYPE = np.int16
+
+
+# ─── ANCIEN CHEMIN (liste de dicts) ─────────────────────────────────────────────
+def load_sales_records(collection, match=None, sort=None) -> pd.DataFrame:
+    # Conservé pour comparer avec le chargeur colonnaire
+    cursor = collection.find(match or {})
+    if sort:
+        cursor = cursor.sort(sort)
+    df = pd.DataFrame(list(cursor))
+    if df.empty:
+        return pd.DataFrame(columns=SALES_COLUMNS)
+    return df.dropna(subset=SALES_COLUMNS)[SALES_COLUMNS].reset_index(drop=True)
+
+
+# ─── CHARGEUR COLONNAIRE ─────────────────────────────────────────────────────────
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    grown = np.empty(size, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def load_sales_columns(collection, match=None, sort=None, batch_size=BATCH_SIZE) -> pd.DataFrame:
+    match = match or {}
+    # Préallocation à partir du nombre de documents ; agrandie si la collection grossit entre-temps
+    n = collection.count_documents(match)
+    dates = np.empty(n, dtype=DATE_DTYPE)
+    codes = np.empty(n, dtype=CODE_DTYPE)
+    qty   = np.empty(n, dtype=QUANTITY_DTYPE)
+    categories = {}
+
+    cursor = collection.find(match, PROJECTION, batch_size=batch_size)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    filled = 0
+    batch_d, batch_c, batch_q = [], [], []
+
+    def flush():
+        nonlocal filled, dates, codes, qty
+        size = len(batch_d)
+        if filled + size > len(dates):
+            new_size = max(filled + size, 2 * len(dates))
+            dates, codes, qty = (_grow(a, new_size) for a in (dates, codes, qty))
+        end = filled + size
+        dates[filled:end] = np.array(batch_d, dtype=DATE_DTYPE)
+        codes[filled:end] = batch_c
+        try:
+            qty[filled:end] = np.array(batch_q, dtype=qty.dtype)
+        except OverflowError:
+            # Quantité hors de l'entier court : on élargit une fois pour toutes
+            qty = qty.astype(np.int32)
+            qty[filled:end] = batch_q
+        filled = end
+        batch_d.clear(); batch_c.clear(); batch_q.clear()
+
+    for doc in cursor:
+        d, c, q = doc.get("purchaseDate"), doc.get("country"), doc.get("quantity")
+        # Équivalent du dropna(subset=[...])
+        if d is None or c is None or q is None:
+            continue
+        code = categories.get(c)
+        if code is None:
+            code = categories[c] = len(categories)
+        batch_d.append(d)
+        batch_c.append(code)
+        batch_q.append(q)
+        if len(batch_d) >= batch_size:
+            flush()
+    if batch_d:
+        flush()
+
+    country = pd.Categorical.from_codes(codes[:filled], categories=pd.Index(list(categories), dtype=str))
+    country = country.reorder_categories(pd.Index(sorted(categories), dtype=str))
+    return pd.DataFrame({
+        "purchaseDate": dates[:filled],
+        "quantity":     qty[:filled],
+        "country":      country,
+    })
+
+
+def frame_from_documents(docs) -> pd.DataFrame:
+    # Même typage que le chargeur colonnaire, pour de petits lots déjà en mémoire
+    df = pd.DataFrame(list(docs), columns=SALES_COLUMNS).dropna(subset=SALES_COLUMNS)
+    qty = df["quantity"].to_numpy(dtype=np.int64)
+    small = qty.size == 0 or np.abs(qty).max() <= np.iinfo(QUANTITY_DTYPE).max
+    return pd.DataFrame({
+        "purchaseDate": df["purchaseDate"].to_numpy(dtype=DATE_DTYPE),
+        "quantity":     qty.astype(QUANTITY_DTYPE if small else np.int32),
+        "country":      pd.Categorical(df["country"], categories=pd.Index(sorted(df["country"].unique()), dtype=str)),
+    })
+
+
+def load_sales(collection, match=None, sort=None, method="columnar") -> pd.DataFrame:
+    if method == "records":
+        return load_sales_records(collection, match, sort)
+    if method == "columnar":
+        return load_sales_columns(collection, match, sort)
+    raise ValueError(f"Méthode de chargement inconnue : {method}")
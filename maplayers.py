@@ -0,0 +1,208 @@
+import json
+
+import numpy as np
+import pandas as pd
+from branca.colormap import StepColormap
+from branca.utilities import color_brewer
+from folium.map import Layer
+from jinja2 import Template
+
+
+# ─── DONNÉES PAR RERUN ──────────────────────────────────────────────────────────
+def stats_payload(stats: pd.DataFrame, key: str, fields: list) -> dict:
+    # {ISO: [valeurs dans l'ordre de `fields`]} : seule partie recalculée à chaque rerun
+    rows = stats.dropna(subset=[key])
+    return dict(zip(rows[key], rows[fields].astype(object).to_numpy().tolist()))
+
+
+def _compact(data) -> str:
+    return json.dumps(data, separators=(",", ":"), default=lambda o: o.item())
+
+
+# ─── COUCHE CHOROPLÈTHE CÔTÉ CLIENT ─────────────────────────────────────────────
+class StatsChoropleth(Layer):
+    """Choroplèthe + infobulles calculées dans le navigateur.
+
+    La géométrie est une chaîne JSON déjà sérialisée (voir geometry.py) insérée
+    telle quelle, une seule fois ; seules les statistiques par code ISO sont
+    produites à chaque rerun. Couleur, survol et infobulle sont calculés par des
+    fonctions JavaScript qui consultent ce dictionnaire, la géométrie n'est
+    jamais modifiée.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function() {
+            var stats = {{ this.stats_json }};
+            var fields = {{ this.fields_json }};
+            var aliases = {{ this.aliases_json }};
+            var edges = {{ this.edges_json }};
+            var colors = {{ this.colors_json }};
+            var valueIndex = {{ this.value_index }};
+
+            function fill(feature) {
+                var row = stats[feature.id];
+                if (!row || !edges.length) return null;
+                var v = row[valueIndex];
+                for (var i = colors.length - 1; i > 0; i--) {
+                    if (v >= edges[i]) return colors[i];
+                }
+                return colors[0];
+            }
+            function style(feature) {
+                var color = fill(feature);
+                return {
+                    weight: 1, color: "black", opacity: {{ this.line_opacity }},
+                    fillColor: color || "{{ this.nan_fill_color }}",
+                    fillOpacity: color ? {{ this.fill_opacity }} : {{ this.nan_fill_opacity }}
+                };
+            }
+            function tooltip(feature) {
+                var row = stats[feature.id];
+                var html = "<table>";
+                for (var i = 0; i < fields.length; i++) {
+                    // Premier champ = libellé ; pays sans vente -> code ISO et zéros
+                    var v = row ? row[i] : (i === 0 ? feature.id : 0);
+                    if (typeof v === "number") v = v.toLocaleString();
+                    html += "<tr><th>" + aliases[i] + "</th><td>" + v + "</td></tr>";
+                }
+                return html + "</table>";
+            }
+            var layer = L.geoJson({{ this.geometry }}, {
+                style: style,
+                onEachFeature: function(feature, featureLayer) {
+                    featureLayer.bindTooltip(function() { return tooltip(feature); }, {sticky: true});
+                    featureLayer.on({
+                        mouseover: function(e) { e.target.setStyle({weight: 3, fillOpacity: {{ this.fill_opacity }} + 0.2}); },
+                        mouseout: function(e) { layer.resetStyle(e.target); }
+                    });
+                }
+            });
+            return layer;
+        })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, geometry: str, stats: dict, fields: list, aliases: list, value_field: str,
+                 name=None, fill_color="YlOrRd", fill_opacity=0.7, line_opacity=0.2,
+                 nan_fill_color="black", nan_fill_opacity=None, bins=6, legend_name="",
+                 overlay=True, control=True, show=True):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = "StatsChoropleth"
+        self.geometry = geometry
+        self.stats_json = _compact(stats)
+        self.fields_json = _compact(fields)
+        self.aliases_json = _compact(aliases)
+        self.value_index = fields.index(value_field)
+        self.fill_opacity = fill_opacity
+        self.line_opacity = line_opacity
+        self.nan_fill_color = nan_fill_color
+        self.nan_fill_opacity = fill_opacity if nan_fill_opacity is None else nan_fill_opacity
+
+        # Mêmes classes que folium.Choropleth : histogramme à pas constant
+        values = np.array([row[self.value_index] for row in stats.values()], dtype=float)
+        self.color_scale = None
+        edges, colors = [], []
+        if len(values):
+            _, bin_edges = np.histogram(values, bins=bins)
+            colors = color_brewer(fill_color, n=len(bin_edges) - 1)
+            edges = bin_edges.tolist()
+            self.color_scale = StepColormap(colors, index=edges, vmin=edges[0], vmax=edges[-1],
+                                            caption=legend_name)
+            self.add_child(self.color_scale)
+        self.edges_json = _compact(edges)
+        self.colors_json = _compact(colors)
+
+    def render(self, **kwargs):
+        if self.color_scale is not None:
+            # La légende se rattache à la carte, comme pour folium.Choropleth
+            self.color_scale._parent = self._parent
+        super().render(**kwargs)
+
+
+# ─── MARQUEURS PROPORTIONNELS CÔTÉ CLIENT ───────────────────────────────────────
+def points_payload(points: pd.DataFrame, fields: list, lat="lat", lon="lon") -> dict:
+    # Colonnes parallèles (un tableau JSON par champ) construites en une passe, sans objet par point
+    rows = points.dropna(subset=[lat, lon])
+    return {
+        "lat":    rows[lat].round(5).tolist(),
+        "lon":    rows[lon].round(5).tolist(),
+        "values": [rows[f].tolist() for f in fields],
+    }
+
+
+class StatsMarkers(Layer):
+    """Cercles proportionnels dessinés dans le navigateur sur un canvas unique.
+
+    Les points arrivent en colonnes (voir points_payload) ; rayon, infobulle et
+    popup sont calculés en JavaScript à partir de ces valeurs. Une seule
+    infobulle et une seule popup sont partagées par tous les cercles : la
+    couche reste fluide au-delà de 100 000 points, là où un CircleMarker et un
+    Popup folium par ligne donnent déjà une page de 13 Mo à 10 000 points.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function() {
+            var data = {{ this.data_json }};
+            var aliases = {{ this.aliases_json }};
+            var radiusIndex = {{ this.radius_index }};
+            var renderer = L.canvas({padding: 0.5});
+            var layer = L.featureGroup();
+            var fmt = function(v) {
+                return typeof v === "number" ? v.toLocaleString(undefined, {maximumFractionDigits: 1}) : v;
+            };
+            // Premier champ = libellé du point
+            function popup(i) {
+                var html = "<b>" + data.values[0][i] + "</b>";
+                for (var f = 1; f < aliases.length; f++) {
+                    html += "<br>" + aliases[f] + " " + fmt(data.values[f][i]);
+                }
+                return html;
+            }
+            function tooltip(i) {
+                return data.values[0][i] + " – " + fmt(data.values[radiusIndex][i]) + {{ this.unit_json }};
+            }
+            for (var i = 0; i < data.lat.length; i++) {
+                var marker = L.circleMarker([data.lat[i], data.lon[i]], {
+                    renderer: renderer,
+                    radius: Math.sqrt(Math.max(data.values[radiusIndex][i], 0)) * {{ this.radius_scale }},
+                    color: "{{ this.color }}", weight: 1,
+                    fill: true, fillOpacity: {{ this.fill_opacity }}
+                });
+                marker.index = i;
+                layer.addLayer(marker);
+            }
+            var hover = L.tooltip();
+            layer.on("mouseover", function(e) {
+                hover.setLatLng(e.layer.getLatLng()).setContent(tooltip(e.layer.index));
+                e.layer._map.openTooltip(hover);
+            });
+            layer.on("mouseout", function(e) { e.layer._map.closeTooltip(hover); });
+            layer.on("click", function(e) {
+                L.popup({maxWidth: {{ this.popup_width }}})
+                    .setLatLng(e.layer.getLatLng()).setContent(popup(e.layer.index))
+                    .openOn(e.layer._map);
+            });
+            return layer;
+        })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, points: dict, fields: list, aliases: list, radius_field: str, radius_scale=4.0,
+                 color="crimson", fill_opacity=0.6, unit="", popup_width=250,
+                 name=None, overlay=True, control=True, show=True):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = "StatsMarkers"
+        self.data_json = _compact(points)
+        self.aliases_json = _compact(aliases)
+        self.radius_index = fields.index(radius_field)
+        self.radius_scale = radius_scale
+        self.color = color
+        self.fill_opacity = fill_opacity
+        self.unit_json = _compact(f" {unit}" if unit else "")
+        self.popup_width = popup_width
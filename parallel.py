@@ -0,0 +1,47 @@
+"""Exécution parallèle des requêtes indépendantes d'une page.
+
+Les chargements d'un rerun (agrégats par pays, page du détail, régions…) ne
+dépendent pas les uns des autres : lancés ensemble sur un pool de threads,
+la latence de la page est celle de la requête la plus lente et non leur somme.
+pymongo libère le GIL pendant les entrées/sorties et son pool de connexions
+est sûr entre threads.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import profiling
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+# Partagé par toutes les sessions du processus ; à garder sous le maxPoolSize du client
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fan_out")
+
+
+def _run(ctx, parent, fn):
+    # Le contexte du script permet aux caches Streamlit de fonctionner dans le thread
+    thread = threading.current_thread()
+    add_script_run_ctx(thread, ctx)
+    try:
+        return profiling.run_child(parent, fn)
+    finally:
+        add_script_run_ctx(thread, None)
+
+
+@profiling.timed
+def fan_out(*calls) -> list:
+    """Appelle chaque fonction sans argument en parallèle ; résultats dans l'ordre des appels.
+
+    La première exception levée par un appel est relancée, après la fin de tous les autres.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    parent = profiling.current()
+    futures = [_executor.submit(_run, ctx, parent, fn) for fn in calls]
+    outcomes = [f.exception() or f.result() for f in futures]
+    profiling.merge([o[1] for o in outcomes if not isinstance(o, BaseException)])
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+    return [result for result, _ in outcomes]
@@ -0,0 +1,267 @@
+"""Instrumentation optionnelle des reruns Streamlit.
+
+Activée par le paramètre d'URL `?profile=1` ou la variable d'environnement
+SALES_PROFILE=1. Chaque rerun mesure ses étapes (chargements, draw_*), la
+taille des cartes et figures envoyées au navigateur, et les succès/échecs des
+caches Streamlit. Le résultat s'affiche dans la sidebar et s'exporte en JSON
+ou au format texte Prometheus.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+import streamlit as st
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+ENV_VAR     = "SALES_PROFILE"
+QUERY_PARAM = "profile"
+HISTORY     = 20
+PREFIX      = "sales_dashboard"
+
+_local = threading.local()
+# Compteurs de cache cumulés sur tout le processus (toutes sessions)
+_cache_counts = Counter()
+_cache_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    if os.environ.get(ENV_VAR) == "1":
+        return True
+    try:
+        return st.query_params.get(QUERY_PARAM) == "1"
+    except Exception:
+        # Hors d'un script Streamlit (CLI, benchmarks)
+        return False
+
+
+# ─── PROFIL D'UN RERUN ──────────────────────────────────────────────────────────
+class RerunProfile:
+    def __init__(self, memory: bool = True):
+        self.started  = time.time()
+        self.stages   = []          # [(nom, profondeur, secondes, pic mémoire en octets ou None)]
+        self.payloads = {}          # {élément: octets}
+        self.cache    = Counter()   # {(fonction, "hit"|"miss"): n} pour ce rerun
+        self.gauges   = {}          # {nom: valeur} relevée pendant ce rerun (taille des caches…)
+        self._depth   = 0
+        self._peaks   = []          # pic courant de chaque étape ouverte (tracemalloc)
+        # Le pic tracemalloc est global au processus : pas de mesure dans les threads parallèles
+        self._memory  = memory
+
+    def to_dict(self) -> dict:
+        return {
+            "started":  self.started,
+            "stages":   [{"stage": n, "depth": d, "seconds": round(s, 6), "peak_bytes": m}
+                         for n, d, s, m in self.stages],
+            "payloads": self.payloads,
+            "cache":    [{"function": f, "result": r, "count": n} for (f, r), n in sorted(self.cache.items())],
+            "gauges":   self.gauges,
+        }
+
+
+def current():
+    # Profil du rerun en cours dans ce thread de script, ou None si désactivé
+    return getattr(_local, "profile", None)
+
+
+def start_rerun():
+    _local.profile = RerunProfile() if enabled() else None
+    return _local.profile
+
+
+@contextmanager
+def stage(name: str):
+    profile = current()
+    if profile is None:
+        yield
+        return
+    index = len(profile.stages)
+    profile.stages.append((name, profile._depth, 0.0, None))
+    profile._depth += 1
+    # Pic mémoire par étape si tracemalloc est actif (benchmarks) : chaque étape
+    # remet le pic à zéro et reporte le sien sur l'étape parente en sortant
+    tracing = profile._memory and tracemalloc.is_tracing()
+    if tracing:
+        base, peak = tracemalloc.get_traced_memory()
+        if profile._peaks:
+            profile._peaks[-1] = max(profile._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        profile._peaks.append(base)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        memory = None
+        if tracing:
+            peak = max(profile._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if profile._peaks:
+                profile._peaks[-1] = max(profile._peaks[-1], peak)
+            memory = peak - base
+        profile._depth -= 1
+        profile.stages[index] = (name, profile._depth, elapsed, memory)
+
+
+def timed(fn):
+    # Décorateur : une étape par appel de fonction (load_*, draw_*)
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with stage(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def record_payload(name: str, size):
+    # `size` : nombre d'octets ou fonction qui le calcule (évaluée seulement si le profilage est actif)
+    profile = current()
+    if profile is not None:
+        profile.payloads[name] = profile.payloads.get(name, 0) + (size() if callable(size) else size)
+
+
+def record_gauge(name: str, value):
+    profile = current()
+    if profile is not None:
+        profile.gauges[name] = value
+
+
+def count_cache(name: str, result: str):
+    # Un appel à un cache : result = "hit" ou "miss"
+    with _cache_lock:
+        _cache_counts[name, result] += 1
+    profile = current()
+    if profile is not None:
+        profile.cache[name, result] += 1
+
+
+def cached(decorator):
+    """Enveloppe un décorateur st.cache_data/st.cache_resource pour compter succès et échecs.
+
+    Usage : @profiling.cached(st.cache_data(ttl=600)) au lieu de @st.cache_data(ttl=600).
+    Le corps de la fonction ne s'exécute que sur un échec de cache : c'est là
+    que l'échec est compté ; tout autre appel est un succès.
+    """
+    def wrap(fn):
+        name = fn.__name__
+        misses = threading.local()
+
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            misses.flag = True
+            return fn(*args, **kwargs)
+
+        cache = decorator(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            misses.flag = False
+            result = cache(*args, **kwargs)
+            count_cache(name, "miss" if misses.flag else "hit")
+            return result
+
+        call.clear = cache.clear
+        return call
+    return wrap
+
+
+# ─── THREADS DE TRAVAIL ─────────────────────────────────────────────────────────
+def run_child(parent, fn):
+    """Exécute `fn` dans un thread de travail ; retourne (résultat, profil enfant ou None).
+
+    L'enfant a son propre profil (sans mesure mémoire) : les étapes des threads
+    parallèles ne se mélangent pas. merge() le rattache ensuite au rerun.
+    """
+    if parent is None:
+        return fn(), None
+    _local.profile = RerunProfile(memory=False)
+    try:
+        return fn(), _local.profile
+    finally:
+        _local.profile = None
+
+
+def merge(children):
+    # Ajoute les étapes des profils enfants sous l'étape en cours du rerun
+    profile = current()
+    if profile is None:
+        return
+    for child in filter(None, children):
+        profile.stages += [(n, profile._depth + d, s, m) for n, d, s, m in child.stages]
+        for name, size in child.payloads.items():
+            profile.payloads[name] = profile.payloads.get(name, 0) + size
+        profile.cache.update(child.cache)
+        profile.gauges.update(child.gauges)
+
+
+# ─── EXPORTS ────────────────────────────────────────────────────────────────────
+def _history() -> list:
+    return st.session_state.setdefault("_profile_history", [])
+
+
+def to_json(profile: RerunProfile) -> str:
+    return json.dumps({"last": profile.to_dict(), "history": _history()}, indent=2, ensure_ascii=False)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus(profile: RerunProfile) -> str:
+    lines = [
+        f"# HELP {PREFIX}_stage_seconds Durée de chaque étape du dernier rerun.",
+        f"# TYPE {PREFIX}_stage_seconds gauge",
+    ]
+    # Une étape appelée plusieurs fois (incremental_sales…) est cumulée : une série par nom
+    stages = Counter()
+    for name, _, seconds, _ in profile.stages:
+        stages[name] += seconds
+    lines += [f'{PREFIX}_stage_seconds{{stage="{_label(n)}"}} {s:.6f}' for n, s in stages.items()]
+    lines += [
+        f"# HELP {PREFIX}_payload_bytes Octets envoyés au navigateur par élément au dernier rerun.",
+        f"# TYPE {PREFIX}_payload_bytes gauge",
+    ]
+    lines += [f'{PREFIX}_payload_bytes{{element="{_label(k)}"}} {v}' for k, v in profile.payloads.items()]
+    for name, value in profile.gauges.items():
+        lines += [f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name} {value}"]
+    lines += [
+        f"# HELP {PREFIX}_cache_requests_total Appels des fonctions en cache depuis le démarrage.",
+        f"# TYPE {PREFIX}_cache_requests_total counter",
+    ]
+    with _cache_lock:
+        counts = sorted(_cache_counts.items())
+    lines += [f'{PREFIX}_cache_requests_total{{function="{_label(f)}",result="{r}"}} {n}' for (f, r), n in counts]
+    return "\n".join(lines) + "\n"
+
+
+# ─── PANNEAU DE DEBUG ───────────────────────────────────────────────────────────
+def render_panel():
+    """À appeler en fin de main() : tableau des étapes, tailles, caches et exports."""
+    profile = current()
+    if profile is None:
+        return
+    history = _history()
+    history.append(profile.to_dict())
+    del history[:-HISTORY]
+
+    with st.sidebar.expander("🔧 Profilage du rerun", expanded=True):
+        total = sum(s for _, d, s, _ in profile.stages if d == 0)
+        st.caption(f"{total * 1000:.0f} ms mesurés sur {len(profile.stages)} étapes")
+        st.dataframe([{"étape": "· " * d + n, "ms": round(s * 1000, 1)} for n, d, s, _ in profile.stages],
+                     hide_index=True, width="stretch")
+        if profile.payloads:
+            st.dataframe([{"élément": k, "Ko": round(v / 1024, 1)} for k, v in profile.payloads.items()],
+                         hide_index=True, width="stretch")
+        if profile.cache:
+            st.dataframe([{"fonction": f, "résultat": r, "appels": n} for (f, r), n in sorted(profile.cache.items())],
+                         hide_index=True, width="stretch")
+        if profile.gauges:
+            st.dataframe([{"mesure": k, "valeur": v} for k, v in profile.gauges.items()],
+                         hide_index=True, width="stretch")
+        # Exports sérialisés au clic seulement, pas à chaque rerun
+        st.download_button("Exporter JSON", lambda: to_json(profile), "profile.json", "application/json",
+                           on_click="ignore")
+        st.download_button("Exporter Prometheus", lambda: to_prometheus(profile), "profile.prom", "text/plain",
+                           on_click="ignore")
@@ -0,0 +1,206 @@
+import pandas as pd
+from bson import ObjectId
+
+from countries import OTHER_REGION, by_region, region_members
+
+# ─── COLONNES DES AGRÉGATS ───────────────────────────────────────────────────────
+STATS_COLUMNS  = ["country", "total", "transactions", "average", "maximum"]
+DAILY_COLUMNS  = ["country", "day", "total", "transactions", "minimum", "maximum", "sumsq"]
+REGION_COLUMNS = ["region", "total", "transactions"]
+DETAIL_COLUMNS = ["purchaseDate", "quantity", "country"]
+PAGE_SIZE      = 100
+
+
+# ─── CONSTRUCTION DES PIPELINES ──────────────────────────────────────────────────
+def build_match(countries=None, start=None, end=None) -> dict:
+    # Équivalent du dropna(subset=[...]) fait auparavant côté pandas. Filtre par type plutôt que
+    # $ne: null : bornes d'index exactes, évaluées sur les clés sans charger les documents (indexes.py)
+    match = {
+        "purchaseDate": {"$type": "date"},
+        "quantity":     {"$type": "number"},
+        "country":      {"$type": "string"},
+    }
+    # countries=None -> tous les pays ; liste vide -> aucun document
+    if countries is not None:
+        match["country"] = {"$in": list(countries)}
+    if start is not None:
+        match["purchaseDate"]["$gte"] = start
+    if end is not None:
+        match["purchaseDate"]["$lt"] = end
+    return match
+
+
+def country_stats_pipeline(countries=None, start=None, end=None) -> list:
+    return [
+        {"$match": build_match(countries, start, end)},
+        {"$group": {
+            "_id":          "$country",
+            "total":        {"$sum": "$quantity"},
+            "transactions": {"$sum": 1},
+            "average":      {"$avg": "$quantity"},
+            "maximum":      {"$max": "$quantity"},
+        }},
+        {"$project": {
+            "_id": 0, "country": "$_id",
+            "total": 1, "transactions": 1, "average": 1, "maximum": 1,
+        }},
+        {"$sort": {"country": 1}},
+    ]
+
+
+def daily_stats_pipeline(countries=None, start=None, end=None) -> list:
+    day = {"$dateFromParts": {
+        "year":  {"$year": "$purchaseDate"},
+        "month": {"$month": "$purchaseDate"},
+        "day":   {"$dayOfMonth": "$purchaseDate"},
+    }}
+    return [
+        {"$match": build_match(countries, start, end)},
+        {"$group": {
+            "_id":          {"country": "$country", "day": day},
+            "total":        {"$sum": "$quantity"},
+            "transactions": {"$sum": 1},
+            "minimum":      {"$min": "$quantity"},
+            "maximum":      {"$max": "$quantity"},
+            "sumsq":        {"$sum": {"$multiply": ["$quantity", "$quantity"]}},
+        }},
+        {"$project": {
+            "_id": 0, "country": "$_id.country", "day": "$_id.day",
+            "total": 1, "transactions": 1, "minimum": 1, "maximum": 1, "sumsq": 1,
+        }},
+    ]
+
+
+def region_stats_pipeline(regions: dict, countries=None, start=None, end=None) -> list:
+    members = region_members(regions).groupby("region", sort=False)["country"].agg(list)
+    # Liste des régions de chaque pays (plusieurs possibles), « Autres » s'il n'en a aucune
+    region_list = {"$concatArrays": [
+        {"$cond": [{"$in": ["$_id", countries_in]}, [region], []]}
+        for region, countries_in in members.items()
+    ]}
+    return [
+        {"$match": build_match(countries, start, end)},
+        # Pré-agrégation par pays : le regroupement par région ne voit que quelques dizaines de lignes
+        {"$group": {
+            "_id":          "$country",
+            "total":        {"$sum": "$quantity"},
+            "transactions": {"$sum": 1},
+        }},
+        {"$set": {"region": region_list}},
+        {"$set": {"region": {"$cond": [{"$eq": [{"$size": "$region"}, 0]}, [OTHER_REGION], "$region"]}}},
+        {"$unwind": "$region"},
+        {"$group": {
+            "_id":          "$region",
+            "total":        {"$sum": "$total"},
+            "transactions": {"$sum": "$transactions"},
+        }},
+        {"$project": {"_id": 0, "region": "$_id", "total": 1, "transactions": 1}},
+        {"$sort": {"region": 1}},
+    ]
+
+
+# Collection résumé (pays, jour), tenue à jour par summary.py : quelques milliers de documents
+def summary_match(countries=None, start=None, end=None) -> dict:
+    # Bornes au jour près : les dashboards filtrent sur des jours entiers
+    match = {}
+    if countries is not None:
+        match["country"] = {"$in": list(countries)}
+    if start is not None or end is not None:
+        match["day"] = {}
+    if start is not None:
+        match["day"]["$gte"] = start
+    if end is not None:
+        match["day"]["$lt"] = end
+    return match
+
+
+def summary_stats_pipeline(countries=None, start=None, end=None) -> list:
+    # Même résultat que country_stats_pipeline, à partir des agrégats journaliers
+    return [
+        {"$match": summary_match(countries, start, end)},
+        {"$group": {
+            "_id":          "$country",
+            "total":        {"$sum": "$total"},
+            "transactions": {"$sum": "$transactions"},
+            "maximum":      {"$max": "$maximum"},
+        }},
+        {"$project": {
+            "_id": 0, "country": "$_id",
+            "total": 1, "transactions": 1, "maximum": 1,
+            "average": {"$divide": ["$total", "$transactions"]},
+        }},
+        {"$sort": {"country": 1}},
+    ]
+
+
+def region_totals(stats: pd.DataFrame, regions: dict) -> pd.DataFrame:
+    # Même résultat que region_stats_pipeline, à partir d'agrégats par pays déjà en mémoire
+    return by_region(stats[["country", "total", "transactions"]], regions)[REGION_COLUMNS]
+
+
+# ─── EXÉCUTION DES REQUÊTES ──────────────────────────────────────────────────────
+def fetch_countries(collection) -> list:
+    return sorted(c for c in collection.distinct("country") if c is not None)
+
+
+def fetch_summary_countries(summary) -> list:
+    return sorted(c for c in summary.distinct("country") if c is not None)
+
+
+def fetch_summary_stats(summary, countries=None, start=None, end=None) -> pd.DataFrame:
+    docs = list(summary.aggregate(summary_stats_pipeline(countries, start, end)))
+    return pd.DataFrame(docs, columns=STATS_COLUMNS)
+
+
+def fetch_summary_daily(summary, countries=None, start=None, end=None) -> pd.DataFrame:
+    # Mêmes colonnes que fetch_daily_stats, lues telles quelles
+    projection = {"_id": 0, **{c: 1 for c in DAILY_COLUMNS}}
+    return pd.DataFrame(list(summary.find(summary_match(countries, start, end), projection)),
+                        columns=DAILY_COLUMNS)
+
+
+def fetch_country_stats(collection, countries=None, start=None, end=None) -> pd.DataFrame:
+    docs = list(collection.aggregate(country_stats_pipeline(countries, start, end)))
+    return pd.DataFrame(docs, columns=STATS_COLUMNS)
+
+
+def fetch_daily_stats(collection, countries=None, start=None, end=None) -> pd.DataFrame:
+    docs = list(collection.aggregate(daily_stats_pipeline(countries, start, end)))
+    return pd.DataFrame(docs, columns=DAILY_COLUMNS)
+
+
+def fetch_region_stats(collection, regions: dict, countries=None, start=None, end=None) -> pd.DataFrame:
+    docs = list(collection.aggregate(region_stats_pipeline(regions, countries, start, end)))
+    return pd.DataFrame(docs, columns=REGION_COLUMNS)
+
+
+def detail_page_query(countries=None, after=None, limit: int = PAGE_SIZE, start=None, end=None) -> dict:
+    # find d'une page : filtre keyset après (date, _id), tri servi par les index date_id et
+    # country_date_id_quantity (indexes.py).
+    # Une ligne de plus que la page pour savoir s'il en reste
+    match = build_match(countries, start, end)
+    if after is not None:
+        date, last_id = after[0], ObjectId(after[1])
+        match = {"$and": [match, {"$or": [
+            {"purchaseDate": {"$gt": date}},
+            {"purchaseDate": date, "_id": {"$gt": last_id}},
+        ]}]}
+    return {
+        "filter":     match,
+        "projection": {"purchaseDate": 1, "quantity": 1, "country": 1},
+        "sort":       [("purchaseDate", 1), ("_id", 1)],
+        "limit":      limit + 1,
+    }
+
+
+def fetch_detail_page(collection, countries=None, after=None, limit: int = PAGE_SIZE,
+                      start=None, end=None) -> tuple:
+    """Une page du détail triée par (purchaseDate, _id), par pagination keyset.
+
+    `after` est la clé (date, _id en texte) renvoyée pour la page précédente ;
+    retourne (lignes, clé de la page suivante ou None).
+    """
+    query = detail_page_query(countries, after, limit, start, end)
+    docs = list(collection.find(query["filter"], query["projection"], sort=query["sort"], limit=query["limit"]))
+    next_key = (docs[limit - 1]["purchaseDate"], str(docs[limit - 1]["_id"])) if len(docs) > limit else None
+    return pd.DataFrame(docs[:limit], columns=DETAIL_COLUMNS), next_key
@@ -0,0 +1,99 @@
+"""Cache LRU des rendus (HTML des cartes, figures Plotly) partagé par toutes les sessions.
+
+Un rendu est identifié par l'élément, la sélection de pays normalisée, la plage
+de dates, la version des données (RollupCube.version) et ses options
+d'affichage : revenir à une sélection déjà vue le sert sans rien reconstruire.
+La taille totale est bornée en octets ; les entrées les moins récemment
+utilisées sont évincées en premier. Succès et échecs sont comptés par
+profiling (panneau et export Prometheus) pour dimensionner le budget.
+"""
+import threading
+from collections import OrderedDict
+
+import profiling
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MAX_BYTES = 64 * 2**20
+
+
+def selection_key(countries) -> tuple:
+    # L'ordre et les doublons de la sélection ne changent ni les agrégats ni la carte
+    return tuple(sorted(set(countries)))
+
+
+def figure_bytes(fig) -> int:
+    # Taille d'une figure Plotly telle qu'envoyée au navigateur
+    return len(fig.to_json())
+
+
+# ─── CACHE ──────────────────────────────────────────────────────────────────────
+class RenderCache:
+    """LRU borné en octets, sûr entre threads.
+
+    Les valeurs sont partagées entre sessions et ne doivent pas être modifiées
+    après insertion (HTML, figures passées telles quelles à Streamlit).
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self._entries  = OrderedDict()   # {clé: (valeur, octets)}, du plus ancien au plus récent
+        self._bytes    = 0
+        self._lock     = threading.Lock()
+
+    def get_or_render(self, name: str, key: tuple, render, size=len):
+        """Rendu en cache pour (name, *key), sinon `render()` mesuré par `size` et mémorisé."""
+        full = (name, *key)
+        with self._lock:
+            entry = self._entries.get(full)
+            if entry is not None:
+                self._entries.move_to_end(full)
+                self.hits += 1
+        if entry is not None:
+            self._report(name, "hit")
+            return entry[0]
+
+        # Rendu hors du verrou : deux sessions peuvent calculer la même clé, la dernière l'emporte
+        value = render()
+        nbytes = size(value)
+        with self._lock:
+            self.misses += 1
+            # Une valeur plus grande que tout le budget n'est pas gardée
+            if nbytes <= self.max_bytes:
+                previous = self._entries.pop(full, None)
+                if previous is not None:
+                    self._bytes -= previous[1]
+                self._entries[full] = (value, nbytes)
+                self._bytes += nbytes
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self.evictions += 1
+        self._report(name, "miss")
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":   len(self._entries),
+                "bytes":     self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "evictions": self.evictions,
+                "hit_rate":  self.hits / lookups if lookups else 0.0,
+            }
+
+    def _report(self, name: str, result: str):
+        profiling.count_cache(f"render:{name}", result)
+        stats = self.stats()
+        for field in ("bytes", "entries", "evictions", "hit_rate"):
+            profiling.record_gauge(f"render_cache_{field}", round(stats[field], 4))
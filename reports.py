@@ -0,0 +1,172 @@
+"""Génère les rapports par région sans Streamlit : graphiques et carte de chaque preset.
+
+Usage : python reports.py OUT [--presets NOM ...] [--start AAAA-MM-JJ] [--end AAAA-MM-JJ]
+                          [--png] [--workers N] [--uri URI] [--geojson FICHIER]
+
+Les agrégats sont lus une seule fois (cube pays × jour depuis le résumé
+sales_daily, puis statistiques par pays et par région) ; chaque preset n'en
+lit qu'un sous-ensemble. Les rendus sont répartis sur un pool de processus :
+OUT/<preset>/ reçoit bar, radar, series et map en HTML (et les graphiques en
+PNG avec --png, qui nécessite kaleido). La comparaison des régions, commune
+à tous les presets, est rendue une fois dans OUT/regions.html ; OUT/index.html
+relie le tout.
+"""
+import argparse
+import html
+import importlib.util
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from pymongo import MongoClient
+
+from countries import ISO_MAP, REGION_PRESETS
+from figures import bar_by_country_figure, choropleth_map, radar_figure, region_bar_figure, time_series_figure
+from geometry import GEOJSON_PATH, prepared_geometry
+from queries import fetch_summary_daily, region_totals
+from rollup import RollupCube, freq_for_range
+from summary import summary_of
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MONGO_URI       = "mongodb://127.0.0.1:27017/"
+DB_NAME         = "appleSales"
+COLLECTION_NAME = "sales"
+MAP_ZOOM        = 4
+# Dimensions des PNG
+IMAGE_WIDTH     = 1000
+IMAGE_HEIGHT    = 600
+
+# Géométrie de la carte, transmise une fois à chaque processus de rendu
+_geometry = None
+
+
+def slug(name: str) -> str:
+    # "Europe de l'Ouest" -> "europe-de-l-ouest"
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-")
+
+
+# ─── AGRÉGATS PARTAGÉS ──────────────────────────────────────────────────────────
+def shared_aggregates(cube: RollupCube, start, end) -> tuple:
+    # Statistiques de tous les pays et de toutes les régions, calculées une fois pour tous les presets
+    stats = cube.query(None, start, end)
+    stats["ISO_A3"] = stats["country"].map(ISO_MAP)
+    return stats, region_totals(stats, REGION_PRESETS)
+
+
+def preset_tasks(cube: RollupCube, stats, presets, start, end) -> list:
+    # Une tâche par preset : sous-ensemble des agrégats partagés, rien n'est regroupé à nouveau
+    freq = freq_for_range(start, end)
+    available = set(stats["country"])
+    tasks = []
+    for name in presets:
+        countries = [c for c in dict.fromkeys(REGION_PRESETS[name]) if c in available]
+        if not countries:
+            continue
+        tasks.append({
+            "name":      name,
+            "slug":      slug(name),
+            "countries": countries,
+            "stats":     stats[stats["country"].isin(countries)].reset_index(drop=True),
+            "series":    cube.series(countries, start, end, freq),
+            "freq":      freq,
+        })
+    return tasks
+
+
+# ─── RENDU ──────────────────────────────────────────────────────────────────────
+def _init_worker(geometry: str):
+    global _geometry
+    _geometry = geometry
+
+
+def write_figure(fig, path: Path, png: bool) -> list:
+    # HTML autonome (plotly.js chargé depuis le CDN) et, sur demande, image statique
+    written = [path.with_suffix(".html")]
+    fig.write_html(written[0], include_plotlyjs="cdn")
+    if png:
+        written.append(path.with_suffix(".png"))
+        fig.write_image(written[1], width=IMAGE_WIDTH, height=IMAGE_HEIGHT)
+    return written
+
+
+def render_preset(task: dict, out_dir: str, png: bool) -> tuple:
+    """Exécuté dans un processus du pool : écrit les fichiers d'un preset ; (nom, fichiers, secondes)."""
+    t0 = time.perf_counter()
+    folder = Path(out_dir) / task["slug"]
+    folder.mkdir(parents=True, exist_ok=True)
+    written = []
+    written += write_figure(bar_by_country_figure(task["stats"]), folder / "bar", png)
+    written += write_figure(radar_figure(task["stats"], task["countries"]), folder / "radar", png)
+    written += write_figure(time_series_figure(task["series"], "country", task["freq"]), folder / "series", png)
+    choropleth_map(task["stats"], _geometry, MAP_ZOOM).save(str(folder / "map.html"))
+    written.append(folder / "map.html")
+    return task["name"], written, time.perf_counter() - t0
+
+
+def write_index(out_dir: Path, results: dict, start, end):
+    items = []
+    for name, files in results.items():
+        links = " · ".join(f'<a href="{f.relative_to(out_dir).as_posix()}">{f.name}</a>' for f in files)
+        items.append(f"<li><b>{html.escape(name)}</b> : {links}</li>")
+    (out_dir / "index.html").write_text(
+        f"<!DOCTYPE html><meta charset='utf-8'><title>Rapports des ventes</title>"
+        f"<h1>Rapports des ventes du {start:%d/%m/%Y} au {end - timedelta(days=1):%d/%m/%Y}</h1>"
+        f"<p><a href='regions.html'>Comparaison des régions</a></p><ul>{''.join(items)}</ul>",
+        encoding="utf-8",
+    )
+
+
+# ─── POINT D'ENTRÉE ─────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out")
+    parser.add_argument("--presets", nargs="+", choices=list(REGION_PRESETS), help="défaut : tous")
+    parser.add_argument("--start", type=date.fromisoformat, help="premier jour inclus (défaut : début des données)")
+    parser.add_argument("--end", type=date.fromisoformat, help="dernier jour inclus (défaut : fin des données)")
+    parser.add_argument("--png", action="store_true", help="exporte aussi les graphiques en PNG (kaleido)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--geojson", default=GEOJSON_PATH)
+    args = parser.parse_args()
+    if args.png and importlib.util.find_spec("kaleido") is None:
+        parser.error("--png nécessite le paquet kaleido (pip install kaleido)")
+
+    t0 = time.perf_counter()
+    # Agrégats (pays, jour) lus dans le résumé tenu à jour à l'écriture
+    summary = summary_of(MongoClient(args.uri)[DB_NAME][COLLECTION_NAME])
+    cube = RollupCube.from_daily(fetch_summary_daily(summary))
+    if cube.n_days == 0:
+        print("Aucune vente : aucun rapport généré")
+        return
+    first, last = cube.days[0].item(), cube.days[-1].item()
+    start = datetime.combine(args.start or first, datetime.min.time())
+    end = datetime.combine(args.end or last, datetime.min.time()) + timedelta(days=1)
+    stats, region_stats = shared_aggregates(cube, start, end)
+    tasks = preset_tasks(cube, stats, args.presets or list(REGION_PRESETS), start, end)
+    print(f"Agrégats : {len(stats)} pays, {len(tasks)} presets en {time.perf_counter() - t0:.2f} s")
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_figure(region_bar_figure(region_stats), out_dir / "regions", args.png)
+
+    results = {}
+    geometry = prepared_geometry(ISO_MAP.values(), MAP_ZOOM, args.geojson)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(geometry,)) as pool:
+        futures = [pool.submit(render_preset, task, str(out_dir), args.png) for task in tasks]
+        for future in as_completed(futures):
+            name, written, seconds = future.result()
+            results[name] = written
+            print(f"✅ {name:<20} {len(written)} fichiers en {seconds:.2f} s")
+
+    # Ordre des presets, pas celui de fin des rendus
+    write_index(out_dir, {t["name"]: results[t["name"]] for t in tasks}, start, end)
+    print(f"Rapports écrits dans {out_dir} en {time.perf_counter() - t0:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
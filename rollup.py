@@ -0,0 +1,251 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from countries import by_region
+from queries import STATS_COLUMNS, region_totals
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+CUBE_COLUMNS   = STATS_COLUMNS + ["minimum", "std"]
+SERIES_COLUMNS = ["period", "country", "total", "transactions"]
+MIN_EMPTY      = np.iinfo(np.int32).max
+MAX_EMPTY      = np.iinfo(np.int32).min
+# Granularité des séries selon la largeur de la plage : (jours au plus, fréquence)
+SERIES_FREQS   = [(92, "D"), (730, "W")]
+FREQ_LABELS    = {"D": "jour", "W": "semaine", "M": "mois"}
+
+_versions = itertools.count(1)
+
+
+def freq_for_range(start, end) -> str:
+    # Jour sur quelques mois, semaine sur deux ans, mois au-delà
+    days = int((np.datetime64(end, "D") - np.datetime64(start, "D")).astype(np.int64))
+    return next((freq for limit, freq in SERIES_FREQS if days <= limit), "M")
+
+
+# ─── CUBE (PAYS × JOUR) ─────────────────────────────────────────────────────────
+class RollupCube:
+    """Agrégats matérialisés par (pays, jour) : somme, nombre, min, max, somme des carrés.
+
+    Construit une fois par rafraîchissement des données ; toutes les requêtes
+    des graphiques (ensemble de pays × plage de dates) se résolvent sur ces
+    tableaux denses de quelques milliers de cellules, sans toucher aux lignes.
+    """
+
+    def __init__(self, countries: pd.Index, first_day, total, count, minimum, maximum, sumsq):
+        self.countries = countries
+        self.first_day = np.datetime64(first_day, "D")
+        self.total     = total
+        self.count     = count
+        self.minimum   = minimum
+        self.maximum   = maximum
+        self.sumsq     = sumsq
+        # Unique dans le processus : un cube n'est jamais modifié, chaque rafraîchissement en crée un
+        # nouveau (clé de version des caches de rendu)
+        self.version   = next(_versions)
+        self._periods  = {}
+
+    @property
+    def n_days(self) -> int:
+        return self.total.shape[1]
+
+    @property
+    def days(self) -> np.ndarray:
+        return self.first_day + np.arange(self.n_days)
+
+    # ─── CONSTRUCTION ───────────────────────────────────────────────────────────
+    @classmethod
+    def empty(cls, countries=None) -> "RollupCube":
+        countries = pd.Index([] if countries is None else countries, dtype=str)
+        shape = (len(countries), 0)
+        return cls(countries, "1970-01-01",
+                   np.zeros(shape, np.int64), np.zeros(shape, np.int64),
+                   np.full(shape, MIN_EMPTY, np.int32), np.full(shape, MAX_EMPTY, np.int32),
+                   np.zeros(shape, np.int64))
+
+    @classmethod
+    def from_arrays(cls, categories, codes, dates, quantity, presorted=False) -> "RollupCube":
+        categories = pd.Index(categories, dtype=str)
+        if len(codes) == 0:
+            return cls.empty(categories)
+        days = dates.astype("datetime64[D]")
+        first_day = days.min()
+        n_days = int((days.max() - first_day).astype(np.int64)) + 1
+        key = codes.astype(np.int64) * n_days + (days - first_day).astype(np.int64)
+        qty = quantity.astype(np.int64)
+        if not presorted:
+            order = np.argsort(key, kind="stable")
+            key, qty = key[order], qty[order]
+
+        # Une cellule = une suite de clés identiques : réductions par segments
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        cells = key[starts]
+        shape = (len(categories), n_days)
+        total   = np.zeros(shape, np.int64)
+        count   = np.zeros(shape, np.int64)
+        sumsq   = np.zeros(shape, np.int64)
+        minimum = np.full(shape, MIN_EMPTY, np.int32)
+        maximum = np.full(shape, MAX_EMPTY, np.int32)
+        total.flat[cells]   = np.add.reduceat(qty, starts)
+        count.flat[cells]   = np.diff(np.r_[starts, len(key)])
+        sumsq.flat[cells]   = np.add.reduceat(qty * qty, starts)
+        minimum.flat[cells] = np.minimum.reduceat(qty, starts)
+        maximum.flat[cells] = np.maximum.reduceat(qty, starts)
+        return cls(categories, first_day, total, count, minimum, maximum, sumsq)
+
+    @classmethod
+    def from_store(cls, store) -> "RollupCube":
+        # Le SalesStore est déjà trié par (pays, date), donc par clé de cellule
+        return cls.from_arrays(store.categories, store.codes, store.dates, store.quantity, presorted=True)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "RollupCube":
+        country = frame["country"].astype("category")
+        return cls.from_arrays(country.cat.categories, country.cat.codes.to_numpy(),
+                               frame["purchaseDate"].to_numpy(), frame["quantity"].to_numpy())
+
+    @classmethod
+    def from_daily(cls, daily: pd.DataFrame) -> "RollupCube":
+        # À partir d'agrégats (pays, jour) déjà calculés, par MongoDB par exemple
+        if daily.empty:
+            return cls.empty()
+        country = daily["country"].astype("category")
+        categories = pd.Index(country.cat.categories, dtype=str)
+        rows = country.cat.codes.to_numpy()
+        days = daily["day"].to_numpy().astype("datetime64[D]")
+        first_day = days.min()
+        cols = (days - first_day).astype(np.int64)
+        shape = (len(categories), int(cols.max()) + 1)
+        total   = np.zeros(shape, np.int64)
+        count   = np.zeros(shape, np.int64)
+        sumsq   = np.zeros(shape, np.int64)
+        minimum = np.full(shape, MIN_EMPTY, np.int32)
+        maximum = np.full(shape, MAX_EMPTY, np.int32)
+        total[rows, cols]   = daily["total"].to_numpy()
+        count[rows, cols]   = daily["transactions"].to_numpy()
+        sumsq[rows, cols]   = daily["sumsq"].to_numpy()
+        minimum[rows, cols] = daily["minimum"].to_numpy()
+        maximum[rows, cols] = daily["maximum"].to_numpy()
+        return cls(categories, first_day, total, count, minimum, maximum, sumsq)
+
+    def _aligned(self, countries: pd.Index, first_day, n_days: int):
+        rows = countries.get_indexer(self.countries)
+        offset = int((self.first_day - first_day).astype(np.int64))
+        cols = slice(offset, offset + self.n_days)
+        out = []
+        for array, fill in ((self.total, 0), (self.count, 0), (self.minimum, MIN_EMPTY),
+                            (self.maximum, MAX_EMPTY), (self.sumsq, 0)):
+            aligned = np.full((len(countries), n_days), fill, array.dtype)
+            aligned[rows, cols] = array
+            out.append(aligned)
+        return out
+
+    def merge(self, other: "RollupCube") -> "RollupCube":
+        # Fusion d'un delta (nouvelles lignes) dans le cube existant
+        if other.n_days == 0:
+            return self
+        if self.n_days == 0:
+            first_day, last_day = other.first_day, other.first_day + other.n_days
+        else:
+            first_day = min(self.first_day, other.first_day)
+            last_day = max(self.first_day + self.n_days, other.first_day + other.n_days)
+        n_days = int((last_day - first_day).astype(np.int64))
+        countries = self.countries.union(other.countries)
+        a = self._aligned(countries, first_day, n_days)
+        b = other._aligned(countries, first_day, n_days)
+        return RollupCube(countries, first_day,
+                          a[0] + b[0], a[1] + b[1],
+                          np.minimum(a[2], b[2]), np.maximum(a[3], b[3]),
+                          a[4] + b[4])
+
+    def period_buckets(self, freq: str) -> tuple:
+        """Buckets semaine (lundi) ou mois agrégés depuis les jours, une fois par cube.
+
+        Retourne (bornes en indices de jour, début de chaque période, total, nombre) ;
+        bornes[p]:bornes[p + 1] sont les jours de la période p.
+        """
+        if freq not in self._periods:
+            days = self.days
+            if freq == "W":
+                labels = days - (days.astype(np.int64) + 3) % 7  # 1970-01-01 était un jeudi
+            elif freq == "M":
+                labels = days.astype("datetime64[M]").astype("datetime64[D]")
+            else:
+                labels = days
+            starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+            self._periods[freq] = (np.r_[starts, self.n_days], labels[starts],
+                                   np.add.reduceat(self.total, starts, axis=1),
+                                   np.add.reduceat(self.count, starts, axis=1))
+        return self._periods[freq]
+
+    # ─── REQUÊTES ───────────────────────────────────────────────────────────────
+    def _day_slice(self, start=None, end=None) -> slice:
+        days = self.days
+        lo = 0 if start is None else int(np.searchsorted(days, np.datetime64(start, "D")))
+        hi = self.n_days if end is None else int(np.searchsorted(days, np.datetime64(end, "D")))
+        return slice(lo, hi)
+
+    def _rows(self, countries=None) -> np.ndarray:
+        if countries is None:
+            return np.arange(len(self.countries))
+        rows = self.countries.get_indexer(list(dict.fromkeys(countries)))
+        return rows[rows >= 0]
+
+    def query(self, countries=None, start=None, end=None) -> pd.DataFrame:
+        # start inclus, end exclu, à la granularité du jour
+        rows = self._rows(countries)
+        days = self._day_slice(start, end)
+        total = self.total[rows, days].sum(axis=1)
+        count = self.count[rows, days].sum(axis=1)
+        sumsq = self.sumsq[rows, days].sum(axis=1)
+        keep = count > 0
+        rows, total, count, sumsq = rows[keep], total[keep], count[keep], sumsq[keep]
+        mean = total / count
+        out = pd.DataFrame({
+            "country":      self.countries[rows],
+            "total":        total,
+            "transactions": count,
+            "average":      mean,
+            "maximum":      self.maximum[rows, days].max(axis=1, initial=MAX_EMPTY),
+            "minimum":      self.minimum[rows, days].min(axis=1, initial=MIN_EMPTY),
+            "std":          np.sqrt(np.maximum(sumsq / count - mean * mean, 0)),
+        })
+        return out[CUBE_COLUMNS].sort_values("country", ignore_index=True)
+
+    def region_totals(self, regions: dict, countries=None, start=None, end=None) -> pd.DataFrame:
+        return region_totals(self.query(countries, start, end), regions)
+
+    def series(self, countries=None, start=None, end=None, freq: str = "D") -> pd.DataFrame:
+        """Ventes par période et par pays sur [start, end), en format long.
+
+        Les périodes entièrement couvertes viennent des buckets précalculés ;
+        seules les deux périodes de bord, tronquées par la plage, sont
+        resommées depuis les jours.
+        """
+        rows = self._rows(countries)
+        days = self._day_slice(start, end)
+        lo, hi = days.start, days.stop
+        if hi <= lo or not len(rows):
+            return pd.DataFrame(columns=SERIES_COLUMNS)
+        bounds, labels, total, count = self.period_buckets(freq)
+        first = int(np.searchsorted(bounds, lo, "right")) - 1
+        last = int(np.searchsorted(bounds, hi, "left"))
+        total = total[rows, first:last]
+        count = count[rows, first:last]
+        for col, p in ((0, first), (-1, last - 1)):
+            a, b = max(lo, bounds[p]), min(hi, bounds[p + 1])
+            if (a, b) != (bounds[p], bounds[p + 1]):
+                total[:, col] = self.total[rows, a:b].sum(axis=1)
+                count[:, col] = self.count[rows, a:b].sum(axis=1)
+        n_periods = last - first
+        return pd.DataFrame({
+            "period":       np.tile(labels[first:last], len(rows)),
+            "country":      self.countries[rows].repeat(n_periods),
+            "total":        total.ravel(),
+            "transactions": count.ravel(),
+        })
+
+    def region_series(self, regions: dict, countries=None, start=None, end=None, freq: str = "D") -> pd.DataFrame:
+        # Quelques centaines de lignes (période × pays) regroupées par région
+        return by_region(self.series(countries, start, end, freq), regions, keys=["period"])
@@ -0,0 +1,148 @@
+"""Statistiques par pays approchées sur un échantillon, avec intervalles de confiance.
+
+Repli des dashboards en mode MongoDB quand le résumé sales_daily n'existe
+pas encore (voir summary.py --rebuild) : sans cube, chaque sélection exacte
+parcourt les ventes brutes, alors qu'un tirage uniforme `$sample` est lu une
+fois par expiration. Avec un cube, la requête exacte est plus rapide que
+l'estimation : ce module ne sert pas.
+
+n lignes tirées sans remise parmi N. Le total d'un pays sur une période est
+estimé par N · moyenne(quantité · [ligne du pays dans la période]), le nombre
+de transactions de même avec l'indicatrice, la moyenne par leur rapport
+(linéarisation). Les demi-largeurs d'intervalle (colonnes *_err) viennent de
+la variance d'échantillonnage sans remise, au quantile normal CONFIDENCE_Z ;
+elles valent NaN quand moins de MIN_SAMPLED_ROWS lignes tirées soutiennent
+l'estimation. Le maximum de l'échantillon n'est qu'une borne inférieure du
+maximum réel.
+
+Les quantités du générateur ont une queue lourde : l'approximation normale
+sous-couvre (89 à 95 % mesurés au quantile 95 % nominal). Les demi-largeurs
+sont donc prises au quantile 99 % nominal, qui couvre de 94 à 99 % selon la
+métrique et la taille des données ; le niveau affiché (CONFIDENCE_LEVEL) est
+le plancher que tests/test_sampling.py vérifie, pas le niveau nominal.
+"""
+import numpy as np
+import pandas as pd
+
+from queries import STATS_COLUMNS
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MONGO_SAMPLE_SIZE  = 50_000
+# Quantile normal des demi-largeurs (2.576 : 99 % nominal, élargi pour les queues lourdes)
+CONFIDENCE_Z       = 2.576
+# Couverture garantie par tests/test_sampling.py, seule annoncée
+CONFIDENCE_LEVEL   = 0.90
+CONFIDENCE_LABEL   = f"IC {CONFIDENCE_LEVEL * 100:.0f} %"
+# En dessous, l'approximation normale n'est plus fiable (quantités à queue lourde) : pas d'intervalle
+MIN_SAMPLED_ROWS   = 100
+ERROR_COLUMNS      = ["total_err", "transactions_err", "average_err"]
+SAMPLE_COLUMNS     = STATS_COLUMNS + ERROR_COLUMNS
+
+
+# ─── ÉCHANTILLON ────────────────────────────────────────────────────────────────
+class SalesSample:
+    """Lignes tirées uniformément et taille de la population d'origine.
+
+    Les lignes sans pays, date ou quantité gardent le code -1 : elles comptent
+    dans le tirage sans appartenir à aucun pays.
+    """
+
+    def __init__(self, categories, codes, dates, quantity, population: int):
+        self.categories = pd.Index(categories, dtype=str)
+        self.codes      = np.asarray(codes, dtype=np.int64)
+        self.dates      = np.asarray(dates, dtype="datetime64[ms]")
+        self.quantity   = np.asarray(quantity, dtype=np.float64)
+        self.population = max(int(population), len(self.codes))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @classmethod
+    def from_documents(cls, docs, population: int) -> "SalesSample":
+        frame = pd.DataFrame(list(docs), columns=["purchaseDate", "quantity", "country"])
+        country = frame["country"].astype("category")
+        valid = frame["purchaseDate"].notna() & frame["quantity"].notna()
+        codes = np.where(valid, country.cat.codes, -1)
+        return cls(country.cat.categories, codes, pd.to_datetime(frame["purchaseDate"]).to_numpy(),
+                   frame["quantity"].fillna(0).to_numpy(dtype=np.float64), population)
+
+    # ─── ESTIMATION ─────────────────────────────────────────────────────────────
+    def stats(self, countries=None, start=None, end=None, z: float = CONFIDENCE_Z) -> pd.DataFrame:
+        """Mêmes colonnes que queries.STATS_COLUMNS, estimées, plus les demi-largeurs *_err.
+
+        Seuls les pays présents dans l'échantillon sur la période apparaissent.
+        """
+        n_countries = len(self.categories)
+        inside = self.codes >= 0
+        if countries is not None:
+            inside &= np.isin(self.codes, self.categories.get_indexer(list(countries)))
+        if start is not None:
+            inside &= self.dates >= np.datetime64(start, "ms")
+        if end is not None:
+            inside &= self.dates < np.datetime64(end, "ms")
+
+        # Moments par pays des lignes retenues : effectif, Σq, Σq²
+        codes, q = self.codes[inside], self.quantity[inside]
+        m = np.bincount(codes, minlength=n_countries).astype(np.float64)
+        s1 = np.bincount(codes, weights=q, minlength=n_countries)
+        s2 = np.bincount(codes, weights=q * q, minlength=n_countries)
+        n, pop = float(len(self)), float(self.population)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = pop / n if n else 0.0
+            # Facteur de variance d'une somme pondérée, correction de population finie comprise
+            factor = pop * pop * (1 - n / pop) / (n * (n - 1)) if n > 1 else 0.0
+            total = weight * s1
+            count = weight * m
+            ratio = np.where(count > 0, total / count, np.nan)
+            # Σd et Σd² des résidus d = q·1 - r·1 ; les indicatrices vérifient 1² = 1
+            d1 = s1 - ratio * m
+            d2 = s2 - 2 * ratio * s1 + ratio * ratio * m
+            var_total = factor * (s2 - s1 * s1 / n)
+            var_count = factor * (m - m * m / n)
+            var_ratio = factor * (d2 - d1 * d1 / n) / (count * count)
+
+        # Tirage complet (factor nul) : valeurs exactes, intervalle nul quel que soit l'effectif
+        unreliable = (factor > 0) & (m < MIN_SAMPLED_ROWS)
+        maximum = np.full(n_countries, -np.inf)
+        np.maximum.at(maximum, codes, q)
+        errors = {
+            "total_err":        z * np.sqrt(np.maximum(var_total, 0)),
+            "transactions_err": z * np.sqrt(np.maximum(var_count, 0)),
+            "average_err":      z * np.sqrt(np.maximum(var_ratio, 0)),
+        }
+        out = pd.DataFrame({
+            "country":          self.categories,
+            "total":            np.round(total),
+            "transactions":     np.round(count),
+            "average":          ratio,
+            "maximum":          maximum,
+            **{name: np.where(unreliable, np.nan, err) for name, err in errors.items()},
+        })[m > 0]
+        return out.sort_values("country", ignore_index=True)[SAMPLE_COLUMNS]
+
+
+# ─── MONGODB ────────────────────────────────────────────────────────────────────
+def fetch_sample(collection, size: int = MONGO_SAMPLE_SIZE) -> SalesSample:
+    # $sample en tête de pipeline : curseur aléatoire du moteur, sans parcourir la collection.
+    # La taille vient des métadonnées (estimated_document_count) : pas de comptage
+    docs = collection.aggregate([
+        {"$sample": {"size": size}},
+        {"$project": {"_id": 0, "purchaseDate": 1, "quantity": 1, "country": 1}},
+    ])
+    return SalesSample.from_documents(docs, collection.estimated_document_count())
+
+
+# ─── AFFICHAGE ──────────────────────────────────────────────────────────────────
+def _interval(err: float, pattern: str) -> str:
+    return "échantillon insuffisant" if np.isnan(err) else pattern.format(err).replace(",", " ")
+
+
+def with_intervals(stats: pd.DataFrame) -> pd.DataFrame:
+    # Colonnes texte « ± … » pour les infobulles ; sans effet sur des statistiques exactes
+    if "total_err" not in stats:
+        return stats
+    return stats.assign(
+        total_ci=stats["total_err"].map(lambda e: _interval(e, "± {:,.0f}")),
+        average_ci=stats["average_err"].map(lambda e: _interval(e, "± {:.1f}")),
+    )
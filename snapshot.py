@@ -0,0 +1,134 @@
+"""Instantané des ventes sur disque, mappé en mémoire par les dashboards.
+
+Usage : python snapshot.py [--path FICHIER] [--every SECONDES] [--once] [--uri URI]
+
+Un processus écrivain tient les ventes à jour par deltas (IncrementalSales) et
+réécrit périodiquement leurs colonnes, déjà triées par (pays, date), dans un
+fichier Arrow IPC non compressé. Les dashboards le mappent en mémoire : les
+colonnes sont lues sans copie et tous les processus d'un même hôte partagent
+les pages du cache système. Le fichier porte la version des données
+(high-water mark des _id) et sa date d'écriture ; au-delà de MAX_AGE, les
+dashboards reviennent à MongoDB et reprennent les deltas depuis cette version.
+
+Le fichier est remplacé d'un bloc (os.replace) : un lecteur garde l'ancien
+contenu jusqu'à son prochain rafraîchissement. Sous Windows, un fichier mappé
+ne peut pas être remplacé ; l'écriture échoue alors et sera retentée.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import MongoClient
+
+from store import SalesStore
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MONGO_URI       = "mongodb://127.0.0.1:27017/"
+DB_NAME         = "appleSales"
+COLLECTION_NAME = "sales"
+SNAPSHOT_PATH   = "sales_snapshot.arrow"
+EVERY_SECONDS   = 60
+# Au-delà, l'instantané est considéré comme abandonné par l'écrivain
+MAX_AGE         = timedelta(minutes=10)
+STAMP_KEY       = b"sales_snapshot"
+
+# pyarrow n'est importé qu'à la première lecture ou écriture : sans instantané
+# configuré, les dashboards démarrent sans lui
+
+
+# ─── ÉCRITURE ───────────────────────────────────────────────────────────────────
+def write_snapshot(path: str, store: SalesStore, high_water, first_id=None) -> dict:
+    """Écrit les colonnes de `store` dans `path` ; retourne la version enregistrée."""
+    import pyarrow as pa
+    stamp = {
+        "high_water": str(high_water),
+        "first_id":   str(first_id) if first_id is not None else None,
+        "written_at": datetime.now(timezone.utc).isoformat(),
+        "rows":       len(store),
+        "categories": [str(c) for c in store.categories],
+    }
+    # Une colonne par tableau du store, ordre chronologique compris : rien à recalculer à la lecture
+    table = pa.table({
+        "country":      store.codes,
+        "purchaseDate": store.dates,
+        "quantity":     store.quantity,
+        "date_order":   store.date_order(),
+    }).replace_schema_metadata({STAMP_KEY: json.dumps(stamp)})
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return stamp
+
+
+# ─── LECTURE ────────────────────────────────────────────────────────────────────
+def read_stamp(path: str):
+    # Version de l'instantané sans lire ses colonnes ; None si absent ou illisible
+    import pyarrow as pa
+    try:
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    raw = metadata.get(STAMP_KEY)
+    return json.loads(raw) if raw else None
+
+
+def is_fresh(stamp: dict, max_age: timedelta = MAX_AGE) -> bool:
+    return datetime.now(timezone.utc) - datetime.fromisoformat(stamp["written_at"]) <= max_age
+
+
+def _column(table, name: str):
+    column = table.column(name)
+    array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    return array.to_numpy(zero_copy_only=True)
+
+
+def read_snapshot(path: str, version: int = 0) -> tuple:
+    """(SalesStore sur les pages du fichier mappé, version enregistrée).
+
+    Les tableaux gardent le mappage ouvert tant qu'ils sont référencés.
+    """
+    import pyarrow as pa
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    stamp = json.loads(table.schema.metadata[STAMP_KEY])
+    store = SalesStore.from_sorted(stamp["categories"], _column(table, "country"), _column(table, "purchaseDate"),
+                                   _column(table, "quantity"), version, _column(table, "date_order"))
+    return store, stamp
+
+
+# ─── ÉCRIVAIN PÉRIODIQUE ────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--path", default=SNAPSHOT_PATH)
+    parser.add_argument("--every", type=float, default=EVERY_SECONDS, help="secondes entre deux écritures")
+    parser.add_argument("--once", action="store_true", help="une seule écriture puis quitte")
+    args = parser.parse_args()
+
+    # Import local : incremental lit les instantanés de ce module
+    from incremental import IncrementalSales
+    sales = IncrementalSales(MongoClient(args.uri)[DB_NAME][COLLECTION_NAME])
+    while True:
+        t0 = time.perf_counter()
+        added = sales.refresh()
+        try:
+            stamp = sales.write_snapshot(args.path)
+            print(f"✅ {stamp['rows']:,} lignes (+{added:,}) écrites dans {args.path} "
+                  f"en {time.perf_counter() - t0:.1f} s")
+        except PermissionError as exc:
+            print(f"❌ {args.path} non remplacé ({exc}) ; nouvel essai dans {args.every:.0f} s")
+        if args.once:
+            return
+        time.sleep(max(0.0, args.every - (time.perf_counter() - t0)))
+
+
+if __name__ == "__main__":
+    main()
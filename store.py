@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+
+# ─── STOCKAGE PARTAGÉ EN LECTURE SEULE ──────────────────────────────────────────
+def _search_through(order, dates, values, side: str) -> np.ndarray:
+    # np.searchsorted(dates[order], values, side) sans matérialiser dates[order] :
+    # recherche binaire vectorisée, log2(len(order)) passes sur les seules valeurs cherchées
+    lo = np.zeros(len(values), dtype=np.intp)
+    hi = np.full(len(values), len(order), dtype=np.intp)
+    while np.any(lo < hi):
+        active = lo < hi
+        mid = (lo + hi) // 2
+        probe = dates[order[np.minimum(mid, len(order) - 1)]]
+        right = active & ((probe < values) if side == "left" else (probe <= values))
+        lo = np.where(right, mid + 1, lo)
+        hi = np.where(active & ~right, mid, hi)
+    return lo
+
+
+class SalesStore:
+    """Instantané des ventes partagé par toutes les sessions d'un même processus.
+
+    Les lignes sont triées une fois par (pays, date) : chaque pays occupe une
+    tranche contiguë et une plage de dates s'y retrouve par recherche binaire.
+    Les tableaux sont en lecture seule ; les filtres renvoient des tableaux
+    d'indices et seules les lignes affichées sont matérialisées.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version: int = 0):
+        codes = frame["country"].cat.codes.to_numpy()
+        dates = frame["purchaseDate"].to_numpy()
+        order = np.lexsort((dates, codes))
+        self._set_columns(frame["country"].cat.categories, codes[order], dates[order],
+                          frame["quantity"].to_numpy()[order], version)
+
+    @classmethod
+    def from_sorted(cls, categories, codes, dates, quantity, version: int = 0, date_order=None) -> "SalesStore":
+        """Instantané sur des colonnes déjà triées par (pays, date), utilisées sans copie.
+
+        Sert aux colonnes d'un fichier mappé en mémoire (snapshot.py) : tous les
+        processus qui le lisent partagent les mêmes pages.
+        """
+        store = cls.__new__(cls)
+        store._set_columns(pd.Index(categories, dtype=str), codes, dates, quantity, version, date_order)
+        return store
+
+    def _set_columns(self, categories, codes, dates, quantity, version, date_order=None):
+        self.version    = version
+        self.categories = categories
+        self.codes      = codes
+        self.dates      = dates
+        self.quantity   = quantity
+        # offsets[i]:offsets[i+1] = lignes du pays i
+        self.offsets    = np.searchsorted(self.codes, np.arange(len(self.categories) + 1))
+        self._date_order = date_order
+        for array in (self.codes, self.dates, self.quantity, self.offsets, date_order):
+            if array is not None:
+                array.flags.writeable = False
+
+    def merge(self, new: pd.DataFrame, version: int) -> "SalesStore":
+        """Nouvel instantané avec les lignes `new` insérées à leur place, sans retrier.
+
+        Les lignes ajoutées sont triées entre elles puis insérées dans la
+        tranche de leur pays par recherche binaire : une copie des colonnes,
+        aucun tri des lignes existantes. L'ordre chronologique, s'il a déjà été
+        calculé, est complété de la même façon. Même résultat que SalesStore
+        sur toutes les lignes ; l'instantané courant n'est pas modifié.
+        """
+        categories = pd.Index(sorted(set(self.categories) | set(new["country"].cat.categories)), dtype=str)
+        remap = categories.get_indexer(self.categories)
+        if np.any(np.diff(remap) < 0):
+            # Pays existants hors de l'ordre alphabétique (autre source que le chargeur) : un tri complet, une fois
+            rows = pd.concat([self.frame().astype({"country": str}), new.astype({"country": str})], ignore_index=True)
+            return SalesStore(rows.astype({"country": pd.CategoricalDtype(categories)}), version)
+        code_dtype = np.promote_types(self.codes.dtype, np.min_scalar_type(-len(categories)))
+        if np.array_equal(remap, np.arange(len(remap))):
+            codes = self.codes.astype(code_dtype, copy=False)
+        else:
+            # Nouveaux pays intercalés : les codes existants restent croissants, les lignes triées
+            codes = np.where(self.codes >= 0, remap[self.codes], -1).astype(code_dtype)
+
+        new_codes = categories.get_indexer(new["country"].astype(str)).astype(code_dtype)
+        new_dates = new["purchaseDate"].to_numpy().astype(self.dates.dtype)
+        quantity_dtype = np.result_type(self.quantity.dtype, new["quantity"].dtype)
+        new_quantity = new["quantity"].to_numpy().astype(quantity_dtype)
+        order = np.lexsort((new_dates, new_codes))
+        new_codes, new_dates, new_quantity = new_codes[order], new_dates[order], new_quantity[order]
+
+        # Position dans les colonnes : après les lignes de même (pays, date) déjà présentes
+        offsets = np.searchsorted(codes, np.arange(-1, len(categories) + 1))
+        pos = np.empty(len(new_codes), dtype=np.intp)
+        for c in np.unique(new_codes):
+            rows = new_codes == c
+            lo, hi = int(offsets[c + 1]), int(offsets[c + 2])
+            pos[rows] = lo + np.searchsorted(self.dates[lo:hi], new_dates[rows], side="right")
+
+        date_order = None
+        if self._date_order is not None:
+            # Indices finals : ligne i -> i + insertions avant elle ; nouvelle ligne j -> pos[j] + j
+            old_order = self._date_order
+            moved = np.arange(len(codes)) + np.cumsum(np.bincount(pos, minlength=len(codes) + 1))[:len(codes)]
+            at = _search_through(old_order, self.dates, new_dates, "left")
+            past = _search_through(old_order, self.dates, new_dates, "right")
+            # À date égale, le tri stable range par indice final, donc par pays
+            for j in np.flatnonzero(past > at):
+                at[j] += np.count_nonzero(codes[old_order[at[j]:past[j]]] <= new_codes[j])
+            by_date = np.argsort(new_dates, kind="stable")
+            date_order = np.insert(moved[old_order], at[by_date], (pos + np.arange(len(pos)))[by_date])
+
+        return SalesStore.from_sorted(
+            categories,
+            np.insert(codes, pos, new_codes),
+            np.insert(self.dates, pos, new_dates),
+            np.insert(self.quantity.astype(quantity_dtype, copy=False), pos, new_quantity),
+            version,
+            date_order,
+        )
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def countries(self) -> list:
+        sizes = np.diff(self.offsets)
+        return [c for c, n in zip(self.categories, sizes) if n]
+
+    def country_slice(self, country, start=None, end=None) -> slice:
+        i = self.categories.get_indexer([country])[0]
+        if i < 0:
+            return slice(0, 0)
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        if start is not None:
+            lo += int(np.searchsorted(self.dates[lo:hi], np.datetime64(start, "ms")))
+        if end is not None:
+            hi = lo + int(np.searchsorted(self.dates[lo:hi], np.datetime64(end, "ms")))
+        return slice(lo, hi)
+
+    def date_order(self) -> np.ndarray:
+        # Ordre chronologique global, calculé une seule fois par instantané
+        if self._date_order is None:
+            order = np.argsort(self.dates, kind="stable")
+            order.flags.writeable = False
+            self._date_order = order
+        return self._date_order
+
+    def select(self, countries=None, start=None, end=None) -> np.ndarray:
+        # Indices des lignes sélectionnées, dans l'ordre chronologique
+        if countries is None:
+            order = self.date_order()
+            if start is None and end is None:
+                return order
+            sorted_dates = self.dates[order]
+            lo = 0 if start is None else np.searchsorted(sorted_dates, np.datetime64(start, "ms"))
+            hi = len(order) if end is None else np.searchsorted(sorted_dates, np.datetime64(end, "ms"))
+            return order[lo:hi]
+
+        slices = [self.country_slice(c, start, end) for c in dict.fromkeys(countries)]
+        slices = [s for s in slices if s.stop > s.start]
+        if not slices:
+            return np.empty(0, dtype=np.intp)
+        if len(slices) == 1:
+            return np.arange(slices[0].start, slices[0].stop)
+        idx = np.concatenate([np.arange(s.start, s.stop) for s in slices])
+        return idx[np.argsort(self.dates[idx], kind="stable")]
+
+    def page(self, countries=None, after=None, limit: int = 100, start=None, end=None) -> np.ndarray:
+        """Indices d'une page de `limit` lignes en ordre chronologique (pagination keyset).
+
+        `after` est la clé (date, indice) de la dernière ligne de la page
+        précédente. Seules `limit` lignes par pays sont examinées : le coût ne
+        dépend pas de la taille de la sélection ni du numéro de page.
+        """
+        if countries is None:
+            countries = self.countries()
+        parts = []
+        for country in dict.fromkeys(countries):
+            s = self.country_slice(country, start, end)
+            lo = s.start
+            if after is not None:
+                date, row = np.datetime64(after[0], "ms"), after[1]
+                dates = self.dates[s]
+                first = s.start + int(np.searchsorted(dates, date, "left"))
+                past = s.start + int(np.searchsorted(dates, date, "right"))
+                # À date égale, les lignes d'un pays sont rangées par indice croissant
+                lo = min(max(row + 1, first), past)
+            parts.append(np.arange(lo, min(lo + limit, s.stop)))
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        idx = np.concatenate(parts)
+        return idx[np.lexsort((idx, self.dates[idx]))[:limit]]
+
+    def key(self, row) -> tuple:
+        # Clé keyset d'une ligne : (date, indice) dans cet instantané
+        return self.dates[row], int(row)
+
+    def take(self, idx) -> pd.DataFrame:
+        # Seul endroit où des lignes sont copiées : ce qui sera effectivement affiché
+        return pd.DataFrame({
+            "purchaseDate": self.dates[idx],
+            "quantity":     self.quantity[idx],
+            "country":      pd.Categorical.from_codes(self.codes[idx], dtype=pd.CategoricalDtype(self.categories)),
+        })
+
+    def frame(self) -> pd.DataFrame:
+        return self.take(slice(None))
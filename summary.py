@@ -0,0 +1,183 @@
+"""Tient à jour la collection résumé des ventes : un document par (pays, jour).
+
+Usage : python summary.py --rebuild [--uri URI]
+        python summary.py --verify [--uri URI]
+
+Chaque écriture de ventes met à jour les agrégats du jour (total, nombre,
+minimum, maximum, somme des carrés) par upserts $inc/$min/$max en bulk : les
+dashboards lisent quelques milliers de documents au lieu des ventes brutes.
+--rebuild recalcule le résumé depuis les ventes brutes (données chargées
+sans passer par ce module) ; --verify compare les deux et liste les écarts.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from pymongo import ASCENDING, IndexModel, MongoClient, UpdateOne
+
+from queries import DAILY_COLUMNS, daily_stats_pipeline, fetch_daily_stats, fetch_summary_daily
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+MONGO_URI       = "mongodb://127.0.0.1:27017/"
+DB_NAME         = "appleSales"
+COLLECTION_NAME = "sales"
+# sales -> sales_daily
+SUMMARY_SUFFIX  = "_daily"
+
+# Clé unique (pays, jour) : les upserts concurrents d'une même clé ne créent pas de doublon
+SUMMARY_INDEXES = [
+    IndexModel([("country", ASCENDING), ("day", ASCENDING)], name="country_day", unique=True),
+    IndexModel([("day", ASCENDING), ("country", ASCENDING)], name="day_country"),
+]
+KEYS   = ["country", "day"]
+VALUES = ["total", "transactions", "minimum", "maximum", "sumsq"]
+
+
+def summary_name(collection_name: str) -> str:
+    return collection_name + SUMMARY_SUFFIX
+
+
+def summary_of(collection):
+    # Collection résumé associée à une collection de ventes
+    return collection.database[summary_name(collection.name)]
+
+
+def ensure_summary_indexes(summary) -> list:
+    return summary.create_indexes(SUMMARY_INDEXES)
+
+
+# ─── AGRÉGATS D'UN LOT ──────────────────────────────────────────────────────────
+def daily_frame(docs) -> pd.DataFrame:
+    # Agrégats (pays, jour) d'un lot de documents, mêmes règles que daily_stats_pipeline
+    df = pd.DataFrame(list(docs), columns=["purchaseDate", "country", "quantity"]).dropna()
+    quantity = df["quantity"].astype(np.int64)
+    grouped = df.assign(
+        day=pd.to_datetime(df["purchaseDate"]).dt.floor("D"),
+        quantity=quantity,
+        square=quantity * quantity,
+    ).groupby(KEYS, sort=False, observed=True)
+    return grouped.agg(
+        total=("quantity", "sum"),
+        transactions=("quantity", "size"),
+        minimum=("quantity", "min"),
+        maximum=("quantity", "max"),
+        sumsq=("square", "sum"),
+    ).reset_index()[DAILY_COLUMNS]
+
+
+def combine_daily(frames) -> pd.DataFrame:
+    # Fusion d'agrégats partiels portant sur des ventes disjointes
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+    return pd.concat(frames, ignore_index=True).groupby(KEYS, sort=False).agg(
+        total=("total", "sum"),
+        transactions=("transactions", "sum"),
+        minimum=("minimum", "min"),
+        maximum=("maximum", "max"),
+        sumsq=("sumsq", "sum"),
+    ).reset_index()[DAILY_COLUMNS]
+
+
+def summary_updates(daily: pd.DataFrame) -> list:
+    # Un upsert par (pays, jour) : le résumé reste juste quel que soit l'ordre des écritures
+    return [
+        UpdateOne(
+            {"country": country, "day": day.to_pydatetime()},
+            {"$inc": {"total": int(total), "transactions": int(transactions), "sumsq": int(sumsq)},
+             "$min": {"minimum": int(minimum)},
+             "$max": {"maximum": int(maximum)}},
+            upsert=True,
+        )
+        for country, day, total, transactions, minimum, maximum, sumsq in daily.itertuples(index=False)
+    ]
+
+
+# ─── ÉCRITURE ───────────────────────────────────────────────────────────────────
+def apply_daily(summary, daily: pd.DataFrame) -> int:
+    # Ajoute des agrégats journaliers au résumé ; nombre de (pays, jour) touchés
+    updates = summary_updates(daily)
+    if updates:
+        summary.bulk_write(updates, ordered=False)
+    return len(updates)
+
+
+def apply_sales(summary, docs) -> int:
+    return apply_daily(summary, daily_frame(docs))
+
+
+def insert_sales(collection, docs) -> int:
+    """Insère des ventes et les reporte dans le résumé ; nombre de documents insérés.
+
+    Les ventes sont écrites d'abord : en cas d'échec entre les deux, --rebuild
+    remet le résumé en accord.
+    """
+    docs = list(docs)
+    if not docs:
+        return 0
+    collection.insert_many(docs, ordered=False)
+    apply_sales(summary_of(collection), docs)
+    return len(docs)
+
+
+def rebuild(collection) -> int:
+    """Recalcule le résumé depuis les ventes brutes ; nombre de (pays, jour).
+
+    Calculé côté serveur dans une collection de staging, renommée ensuite :
+    les lecteurs voient l'ancien résumé jusqu'au bout.
+    """
+    summary = summary_of(collection)
+    db = collection.database
+    staging_name = f"{summary.name}_staging_{os.getpid()}"
+    db.drop_collection(staging_name)
+    try:
+        collection.aggregate(daily_stats_pipeline() + [{"$out": staging_name}])
+        ensure_summary_indexes(db[staging_name])
+        db[staging_name].rename(summary.name, dropTarget=True)
+    except BaseException:
+        db.drop_collection(staging_name)
+        raise
+    return summary.count_documents({})
+
+
+# ─── VÉRIFICATION ───────────────────────────────────────────────────────────────
+def diff(collection) -> pd.DataFrame:
+    # (pays, jour) dont le résumé diffère des ventes brutes, valeurs des deux côtés
+    raw = fetch_daily_stats(collection)
+    kept = fetch_summary_daily(summary_of(collection))
+    merged = raw.merge(kept, on=KEYS, how="outer", suffixes=("_ventes", "_resume"), indicator=True)
+    differs = merged["_merge"] != "both"
+    for col in VALUES:
+        differs |= merged[f"{col}_ventes"].ne(merged[f"{col}_resume"])
+    ecart = merged["_merge"].map({"left_only": "absent du résumé", "right_only": "absent des ventes",
+                                  "both": "valeurs"}).astype(str)
+    return merged.assign(ecart=ecart)[differs].drop(columns="_merge").sort_values(KEYS, ignore_index=True)
+
+
+# ─── POINT D'ENTRÉE ─────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=MONGO_URI)
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--rebuild", action="store_true", help="recalcule le résumé depuis les ventes")
+    action.add_argument("--verify", action="store_true", help="compare le résumé aux ventes")
+    args = parser.parse_args()
+
+    collection = MongoClient(args.uri)[DB_NAME][COLLECTION_NAME]
+    if args.rebuild:
+        print(f"✅ {summary_name(COLLECTION_NAME)} reconstruit : {rebuild(collection):,} (pays, jour)")
+        return
+
+    gaps = diff(collection)
+    if gaps.empty:
+        print(f"✅ {summary_name(COLLECTION_NAME)} conforme aux ventes brutes")
+        return
+    print(gaps.to_string(index=False))
+    print(f"❌ {len(gaps)} (pays, jour) en écart ; python summary.py --rebuild pour corriger")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
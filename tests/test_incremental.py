@@ -0,0 +1,95 @@
+"""Rafraîchissement incrémental comparé à un rechargement complet, sur mongomock."""
+import random
+import time
+from datetime import datetime, timedelta
+
+import mongomock
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental import IncrementalSales
+from queries import fetch_country_stats
+
+COUNTRIES = ["France", "Allemagne", "Italie", "Suède", "Japon"]
+NO_LAG    = timedelta(0)
+
+
+def random_docs(rng: random.Random, n: int, countries: list) -> list:
+    base_date = datetime(2025, 1, 1)
+    return [{
+        "purchaseDate": base_date + timedelta(days=rng.randint(0, 364), minutes=rng.randint(0, 1439)),
+        "country":      rng.choice(countries),
+        "quantity":     rng.randint(1, 20),
+    } for _ in range(n)]
+
+
+def canonical(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.assign(country=df["country"].astype(str), quantity=df["quantity"].astype(np.int64))
+    return out.sort_values(["purchaseDate", "country", "quantity"], ignore_index=True)
+
+
+def insert_and_wait(collection, docs):
+    collection.insert_many(docs)
+    # Les ObjectId ne sont datés qu'à la seconde : le prochain high-water mark doit couvrir ces documents
+    time.sleep(1.1)
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient().appleSales.sales
+
+
+def test_deltas_match_full_reload(collection):
+    rng = random.Random(0)
+    insert_and_wait(collection, random_docs(rng, 1_000, COUNTRIES[:3]))
+    sales = IncrementalSales(collection, lag=NO_LAG)
+    assert sales.refresh() == 1_000
+    for i in range(3):
+        # Nouveaux pays au fil des tours pour exercer l'union des catégories
+        insert_and_wait(collection, random_docs(rng, 500, COUNTRIES[:3 + i]))
+        assert sales.refresh() == 500
+
+    full = IncrementalSales(collection, lag=NO_LAG)
+    full.refresh()
+    pd.testing.assert_frame_equal(canonical(sales.frame), canonical(full.frame))
+    pd.testing.assert_frame_equal(sales.country_stats(), full.country_stats())
+
+    server = fetch_country_stats(collection)
+    exact = {"total": np.int64, "transactions": np.int64, "maximum": np.int64}
+    assert sales.countries() == list(server["country"])
+    pd.testing.assert_frame_equal(sales.country_stats()[list(exact)].astype(exact),
+                                  server[list(exact)].astype(exact))
+
+
+def test_detail_pages_follow_deltas(collection):
+    rng = random.Random(1)
+    insert_and_wait(collection, random_docs(rng, 300, COUNTRIES))
+    sales = IncrementalSales(collection, lag=NO_LAG)
+    sales.refresh()
+    sales.store.date_order()
+    insert_and_wait(collection, random_docs(rng, 200, COUNTRIES))
+    sales.refresh()
+
+    rows, key = [], None
+    while True:
+        page, key = sales.detail_page(None, key, limit=64)
+        rows.append(page)
+        if key is None:
+            break
+    paged = pd.concat(rows, ignore_index=True)
+    pd.testing.assert_frame_equal(canonical(paged), canonical(sales.frame[paged.columns]))
+    assert paged["purchaseDate"].is_monotonic_increasing
+
+
+def test_replaced_collection_reloads(collection):
+    rng = random.Random(2)
+    insert_and_wait(collection, random_docs(rng, 200, COUNTRIES[:2]))
+    sales = IncrementalSales(collection, lag=NO_LAG)
+    sales.refresh()
+
+    # insertion.py fait un drop() puis réinsère : les anciens documents ne doivent pas survivre
+    collection.drop()
+    insert_and_wait(collection, random_docs(rng, 50, ["Japon"]))
+    assert sales.refresh() == 50
+    assert sales.countries() == ["Japon"]
@@ -0,0 +1,63 @@
+"""Couverture des intervalles des statistiques approchées, sur des ventes synthétiques.
+
+Chaque tirage uniforme (le `$sample` du repli MongoDB, simulé en mémoire) est
+comparé aux valeurs exactes du cube ; la part des valeurs exactes tombant dans
+l'intervalle annoncé doit atteindre le niveau affiché par les dashboards.
+"""
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from generator import sales_frame
+from rollup import RollupCube
+from sampling import CONFIDENCE_LEVEL, MONGO_SAMPLE_SIZE, SalesSample
+from store import SalesStore
+
+ROWS       = 500_000
+TRIALS     = 10
+METRICS    = ["total", "transactions", "average"]
+SELECTIONS = [
+    (None, None, None),
+    (None, datetime(2025, 4, 1), datetime(2025, 7, 1)),
+    (("France", "Allemagne", "Italie", "Espagne", "Pologne"), datetime(2025, 10, 1), datetime(2025, 11, 1)),
+]
+
+
+def uniform(frame, size: int, seed) -> SalesSample:
+    rows = frame.iloc[np.random.default_rng(seed).choice(len(frame), size, replace=False)]
+    return SalesSample.from_documents(rows.astype({"country": str}).to_dict("records"), len(frame))
+
+
+def coverage(exact, estimate) -> dict:
+    # {métrique: (dans l'intervalle, intervalles annoncés)}
+    joined = exact.merge(estimate, on="country", suffixes=("", "_est"))
+    stated = joined[joined["total_err"].notna()]
+    out = {}
+    for metric in METRICS:
+        # Demi-unité de marge pour totaux et transactions, arrondis à l'estimation
+        margin = 0.5 if metric != "average" else 1e-9
+        inside = (stated[metric] - stated[f"{metric}_est"]).abs() <= stated[f"{metric}_err"] + margin
+        out[metric] = (int(inside.sum()), len(stated))
+    return out
+
+
+@pytest.fixture(scope="module")
+def totals():
+    frame = sales_frame(ROWS, seed=0)
+    cube = RollupCube.from_store(SalesStore(frame))
+    totals = dict.fromkeys(METRICS, (0, 0))
+    for trial in range(TRIALS):
+        sample = uniform(frame, MONGO_SAMPLE_SIZE, trial)
+        for countries, start, end in SELECTIONS:
+            exact = cube.query(countries, start, end)
+            for metric, (hit, n) in coverage(exact, sample.stats(countries, start, end)).items():
+                totals[metric] = (totals[metric][0] + hit, totals[metric][1] + n)
+    return totals
+
+
+@pytest.mark.parametrize("metric", METRICS)
+def test_coverage_reaches_stated_level(totals, metric):
+    hit, n = totals[metric]
+    assert n > 0
+    assert hit / n >= CONFIDENCE_LEVEL
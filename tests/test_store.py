@@ -0,0 +1,57 @@
+"""Insertion de lignes dans un SalesStore comparée à une reconstruction complète."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from generator import sales_frame
+from store import SalesStore
+
+
+def sorted_countries(frame: pd.DataFrame) -> pd.DataFrame:
+    # Catégories triées, comme celles du chargeur (loader.py)
+    return frame.assign(country=frame["country"].cat.reorder_categories(sorted(frame["country"].cat.categories)))
+
+
+def rebuilt(first: pd.DataFrame, second: pd.DataFrame) -> SalesStore:
+    rows = pd.concat([first.astype({"country": str}), second.astype({"country": str})], ignore_index=True)
+    categories = pd.CategoricalDtype(sorted(rows["country"].unique()))
+    return SalesStore(rows.astype({"country": categories}))
+
+
+@pytest.fixture
+def halves():
+    frame = sales_frame(20_000, seed=1)
+    first, second = frame.iloc[:15_000], frame.iloc[15_000:]
+    # Un pays absent de la première moitié, et des lignes en double (même pays, même date)
+    first = first[first["country"] != "France"]
+    second = pd.concat([second, second.iloc[:50]])
+    return sorted_countries(first.assign(country=first["country"].cat.remove_unused_categories())), \
+        second.assign(country=second["country"].astype(str).astype("category"))
+
+
+@pytest.mark.parametrize("with_date_order", [False, True])
+@pytest.mark.parametrize("sorted_first", [True, False])
+def test_merge_matches_rebuild(halves, with_date_order, sorted_first):
+    first, second = halves
+    if not sorted_first:
+        first = first.assign(country=first["country"].cat.reorder_categories(first["country"].cat.categories[::-1]))
+    store = SalesStore(first, 1)
+    if with_date_order:
+        store.date_order()
+
+    merged = store.merge(second, 2)
+    expected = rebuilt(first, second)
+    assert merged.version == 2
+    assert list(merged.categories) == list(expected.categories)
+    for name in ("codes", "dates", "quantity", "offsets"):
+        np.testing.assert_array_equal(getattr(merged, name), getattr(expected, name))
+    np.testing.assert_array_equal(merged.date_order(), expected.date_order())
+
+
+def test_merge_leaves_previous_store_unchanged(halves):
+    first, second = halves
+    store = SalesStore(first, 1)
+    before = store.frame()
+    store.merge(second, 2)
+    pd.testing.assert_frame_equal(store.frame(), before)
+    assert len(store) == len(first)
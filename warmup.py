@@ -0,0 +1,68 @@
+"""Préchauffage en arrière-plan au démarrage d'un dashboard.
+
+Le premier affichage n'attend que streamlit et pandas : les bibliothèques de
+rendu (plotly, folium…) ne sont importées que par les vues qui s'en servent.
+Au premier rerun du processus, un thread les importe, et appelle les
+chargeurs passés en tâches (la géométrie de la carte choroplèthe), pendant
+que la page charge ses données ; leurs caches Streamlit font attendre le
+rerun qui demande une valeur encore en calcul plutôt que de la recalculer.
+Les données ne sont pas préchauffées : le rerun les demande aussitôt.
+"""
+import importlib
+import logging
+import threading
+import time
+
+from streamlit.runtime.scriptrunner_utils import script_run_context
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+# Importés en arrière-plan, dans l'ordre : les plus coûteux d'abord
+RENDER_MODULES = ["figures", "maplayers", "client_view", "pyarrow.parquet"]
+
+log = logging.getLogger(__name__)
+
+_started = set()
+_lock = threading.Lock()
+
+
+class _WarmupThreads(logging.Filter):
+    # Sans contexte de script, les caches Streamlit le signalent à chaque appel : attendu ici
+    def filter(self, record) -> bool:
+        return not record.threadName.startswith("warmup-")
+
+
+logging.getLogger(script_run_context.__name__).addFilter(_WarmupThreads())
+
+
+def preload(modules=RENDER_MODULES):
+    # Un module absent n'empêche pas le préchauffage des suivants
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            log.warning("préchauffage : import de %s impossible", name)
+
+
+def _run(name: str, tasks):
+    for task in tasks:
+        t0 = time.perf_counter()
+        try:
+            task()
+        except Exception:
+            # Le chemin normal refera l'appel et affichera l'erreur à l'utilisateur
+            log.warning("préchauffage %s : %s en échec", name, task.__name__, exc_info=True)
+            continue
+        log.info("préchauffage %s : %s en %.2f s", name, task.__name__, time.perf_counter() - t0)
+
+
+def start(name: str, *tasks) -> bool:
+    """Lance `tasks` une fois par processus, dans l'ordre, dans un thread démon.
+
+    `name` identifie le dashboard ; retourne False si son préchauffage a déjà été lancé.
+    """
+    with _lock:
+        if name in _started:
+            return False
+        _started.add(name)
+    threading.Thread(target=_run, args=(name, tasks), name=f"warmup-{name}", daemon=True).start()
+    return True